@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from app.db.session import SessionLocal
 from app.db import crud_messages
 from app.db.models import Conversation, Message
+from app.vectorstore.store import delete_conversation_chunks
 
 router = APIRouter(prefix="/conversations", tags=["Conversations"])
 
@@ -119,6 +120,8 @@ def delete_conversation(
     db.delete(convo)
     db.commit()
 
+    delete_conversation_chunks(conversation_id)
+
     return {
         "status": "deleted",
         "conversation_id": conversation_id,
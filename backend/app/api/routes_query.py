@@ -1,14 +1,17 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
 from app.db import crud_messages
-from app.db.models import Conversation
 
-from app.retrieval.hybrid import hybrid_retrieve
-from app.llm.answer_generator import stream_answer
+from app.retrieval.candidate import Candidate
+from app.retrieval.hybrid import hybrid_retrieve_async
+from app.llm.answer_generator import stream_answer_async
+from app.llm.embeddings import embed_query_async
 
 router = APIRouter()
 
@@ -21,12 +24,9 @@ HYBRID_ALPHA = 0.5
 # --------------------------------------------------
 # DB dependency
 # --------------------------------------------------
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # --------------------------------------------------
 # Request schema (locked)
@@ -38,7 +38,21 @@ class QueryRequest(BaseModel):
 # --------------------------------------------------
 # Citation helpers (stable numbering)
 # --------------------------------------------------
-def build_sources_and_contexts(docs: list[dict]):
+def _page_label(meta: dict) -> str:
+    first = meta.get("page_start", meta.get("page"))
+    last = meta.get("page_end", first)
+    if first is None:
+        return ""
+    return f", p. {first}" if first == last else f", pp. {first}-{last}"
+
+
+def _server_timing(timings: dict) -> str:
+    return ", ".join(
+        f"retrieval-{stage};dur={ms}" for stage, ms in timings.items()
+    )
+
+
+def build_sources_and_contexts(docs: list[Candidate]):
     if not docs:
         return [], []
 
@@ -46,7 +60,7 @@ def build_sources_and_contexts(docs: list[dict]):
     seen = set()
 
     for d in docs:
-        src = d.get("source", "unknown")
+        src = d.source
         if src not in seen:
             seen.add(src)
             sources.append(src)
@@ -54,8 +68,8 @@ def build_sources_and_contexts(docs: list[dict]):
     source_index = {src: i + 1 for i, src in enumerate(sources)}
 
     contexts = [
-        f"[{source_index.get(d.get('source', 'unknown'))}] "
-        f"({d.get('source', 'unknown')})\n{d['text']}"
+        f"[{source_index[d.source]}] "
+        f"({d.source}{_page_label(d.meta or {})})\n{d.text}"
         for d in docs
     ]
 
@@ -68,67 +82,89 @@ def build_sources_and_contexts(docs: list[dict]):
 async def query_stream(
     req: QueryRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    # Load or create conversation
-    conversation = (
-        db.query(Conversation)
-        .filter(Conversation.id == req.conversation_id)
-        .first()
-        if req.conversation_id is not None
-        else None
-    )
+    # The query embedding only needs the text: start it now so the
+    # network round trip overlaps the conversation / history DB work
+    embedding = asyncio.create_task(embed_query_async(req.query))
 
-    if conversation is None:
-        conversation = crud_messages.create_conversation(db)
+    try:
+        # Load or create conversation
+        conversation = (
+            await crud_messages.get_conversation_async(db, req.conversation_id)
+            if req.conversation_id is not None
+            else None
+        )
 
-    conversation_id = conversation.id
+        if conversation is None:
+            conversation = await crud_messages.create_conversation_async(db)
 
-    # Store user message
-    crud_messages.add_message(
-        db,
-        conversation_id=conversation_id,
-        role="user",
-        content=req.query,
-    )
+        conversation_id = conversation.id
+
+        # Store user message
+        await crud_messages.add_message_async(
+            db,
+            conversation_id=conversation_id,
+            role="user",
+            content=req.query,
+        )
+
+        history = await crud_messages.get_recent_messages_async(
+            db, conversation_id, limit=10
+        )
+    except BaseException:
+        embedding.cancel()
+        raise
 
-    history = crud_messages.get_recent_messages(
-        db, conversation_id, limit=10
-    )
     history_pairs = [(m.role, m.content) for m in history]
 
     # Final evaluated pipeline: hybrid retrieval only
-    docs = hybrid_retrieve(
-        req.query,
-        conversation_id=conversation_id,
-        k=RETRIEVAL_K,
-        alpha=HYBRID_ALPHA,
-    )
+    trace: dict = {}
+    try:
+        docs = await hybrid_retrieve_async(
+            req.query,
+            conversation_id=conversation_id,
+            k=RETRIEVAL_K,
+            alpha=HYBRID_ALPHA,
+            trace=trace,
+            query_vec=embedding,
+        )
+    finally:
+        # No-op once awaited; stops it if retrieval failed before the dense stage
+        embedding.cancel()
+    headers = {"Server-Timing": _server_timing(trace.get("timings", {}))}
+
+    # The request-scoped session may already be closed once the
+    # response starts streaming, so the final write uses its own.
+    async def save_answer(content: str, sources: list[str]):
+        async with AsyncSessionLocal() as session:
+            await crud_messages.add_message_async(
+                session,
+                conversation_id=conversation_id,
+                role="assistant",
+                content=content,
+                meta={"sources": sources},
+            )
 
     # Handle empty retrieval case explicitly
     if not docs:
-        def empty_stream():
+        async def empty_stream():
             msg = "I don't have enough information in the provided documents."
             yield msg
-            crud_messages.add_message(
-                db,
-                conversation_id=conversation_id,
-                role="assistant",
-                content=msg,
-                meta={"sources": []},
-            )
+            await save_answer(msg, [])
 
         return StreamingResponse(
             empty_stream(),
             media_type="text/plain",
+            headers=headers,
         )
 
     sources, contexts = build_sources_and_contexts(docs)
 
-    def event_stream():
+    async def event_stream():
         full_answer = ""
 
-        for token in stream_answer(
+        async for token in stream_answer_async(
             req.query,
             contexts,
             history_pairs,
@@ -138,15 +174,10 @@ async def query_stream(
             full_answer += token
             yield token
 
-        crud_messages.add_message(
-            db,
-            conversation_id=conversation_id,
-            role="assistant",
-            content=full_answer,
-            meta={"sources": sources},
-        )
+        await save_answer(full_answer, sources)
 
     return StreamingResponse(
         event_stream(),
         media_type="text/plain",
+        headers=headers,
     )
@@ -0,0 +1,103 @@
+"""
+Chunker throughput and chunk-size spread: fixed 800-char windows vs the
+token-aware streaming chunker.
+
+Reports MB/s plus the token-count distribution of the produced chunks
+(fixed character windows drift in token size; token-aware chunks stay
+under the budget). The streaming chunker is fed 1 MiB blocks, as the
+ingestion pipeline does for text files.
+
+Run from backend/:
+    python -m app.benchmarks.bench_chunking --mb 8
+    python -m app.benchmarks.bench_chunking --file some.txt --max-tokens 512
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.ingestion.text_splitter import chunk_text, iter_token_chunks
+from app.llm.tokens import count_tokens_batch
+
+MODEL = "text-embedding-3-small"
+BLOCK = 1 << 20
+
+
+def make_text(mb: int) -> str:
+    """
+    Paragraphs of sentences with varied lengths.
+    """
+    words = (
+        "micro small medium enterprise credit guarantee scheme turnover "
+        "investment plant machinery udyam registration subsidy the of and "
+        "for under with ministry eligible"
+    ).split()
+    rng = random.Random(0)
+    out, size = [], 0
+    while size < mb * 1_000_000:
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(4, 45))).capitalize()
+            + rng.choice(".?!")
+            for _ in range(rng.randint(1, 9))
+        ]
+        para = " ".join(sentences)
+        out.append(para)
+        size += len(para) + 2
+    return "\n\n".join(out)
+
+
+def blocks(text: str):
+    for i in range(0, len(text), BLOCK):
+        yield None, text[i:i + BLOCK]
+
+
+def report(name: str, seconds: float, mb: float, tokens: list[int]):
+    t = np.array(tokens)
+    print(
+        f"  {name:<14} {mb / seconds:>6.2f} MB/s | {len(t):>7} chunks | tokens "
+        f"p5={np.percentile(t, 5):.0f} p50={np.percentile(t, 50):.0f} "
+        f"p95={np.percentile(t, 95):.0f} max={t.max()}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file")
+    parser.add_argument("--mb", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    else:
+        text = make_text(args.mb)
+    mb = len(text.encode()) / 1e6
+    print(f"\n{mb:.1f} MB of text\n")
+
+    # Token counting is part of the token-aware chunker's cost, not the
+    # fixed-window one's, so sizes are measured after timing
+    t0 = time.perf_counter()
+    fixed = chunk_text(text)
+    dt = time.perf_counter() - t0
+    report("fixed-800char", dt, mb, count_tokens_batch(fixed, MODEL))
+
+    t0 = time.perf_counter()
+    tokens = [
+        c["tokens"]
+        for c in iter_token_chunks(
+            blocks(text),
+            max_tokens=args.max_tokens,
+            overlap_tokens=args.overlap_tokens,
+            model=MODEL,
+        )
+    ]
+    dt = time.perf_counter() - t0
+    report("token-aware", dt, mb, tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Ingest embedding throughput against a local stub embeddings server.
+
+The stub mimics /v1/embeddings: fixed per-request latency plus a per-token
+cost, a per-request token limit, and randomly injected 429s. No API key
+or network access is needed.
+
+Run from backend/:
+    python -m app.benchmarks.bench_embedding_batcher
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openai import OpenAI
+
+from app.llm.embedding_batcher import EmbeddingBatcher
+from app.llm.tokens import count_tokens
+
+MODEL = "text-embedding-3-small"
+
+
+def make_stub_handler(args):
+    class StubEmbeddings(BaseHTTPRequestHandler):
+        def log_message(self, *a):
+            pass
+
+        def _reply(self, status: int, body: dict, headers: dict | None = None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            inputs = body["input"]
+            tokens = sum(count_tokens(t, MODEL) for t in inputs)
+
+            if tokens > args.server_max_tokens:
+                self._reply(400, {"error": {"message": "max tokens per request exceeded"}})
+                return
+
+            if random.random() < args.rate_limit_prob:
+                self._reply(
+                    429,
+                    {"error": {"message": "rate limited", "type": "rate_limit"}},
+                    {"retry-after": str(args.retry_after)},
+                )
+                return
+
+            time.sleep(args.latency_ms / 1000 + tokens * args.us_per_token / 1e6)
+
+            # The SDK asks for base64 float32 by default, like the real API
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(bytes(4 * args.dims)).decode()
+            else:
+                vector = [0.0] * args.dims
+
+            self._reply(
+                200,
+                {
+                    "object": "list",
+                    "model": body["model"],
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": vector}
+                        for i in range(len(inputs))
+                    ],
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                },
+            )
+
+    return StubEmbeddings
+
+
+def make_chunks(n: int, chars: int) -> list[str]:
+    words = ["msme", "loan", "interest", "subsidy", "credit", "scheme", "limit", "rate"]
+    out = []
+    for i in range(n):
+        text = f"chunk {i} "
+        while len(text) < chars:
+            text += random.choice(words) + " "
+        out.append(text[:chars])
+    return out
+
+
+def run_case(label: str, batcher: EmbeddingBatcher, chunks: list[str]):
+    t0 = time.perf_counter()
+    try:
+        vectors = batcher.embed(chunks)
+    except Exception as e:
+        print(f"  {label:<34} FAILED: {type(e).__name__}: {e}")
+        return
+    dt = time.perf_counter() - t0
+    assert len(vectors) == len(chunks)
+    print(
+        f"  {label:<34} {dt:>7.2f} s | {len(chunks) / dt:>8.1f} chunks/s "
+        f"| {len(batcher.split(chunks))} requests"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--chunk-chars", type=int, default=800)
+    parser.add_argument("--batch-tokens", type=int, default=20_000)
+    parser.add_argument("--server-max-tokens", type=int, default=300_000)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--us-per-token", type=float, default=5)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=float, default=0.1)
+    parser.add_argument("--dims", type=int, default=1536)
+    args = parser.parse_args()
+
+    random.seed(0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub_handler(args))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OpenAI(
+        api_key="stub",
+        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        max_retries=0,
+    )
+
+    chunks = make_chunks(args.chunks, args.chunk_chars)
+    print(f"\n{len(chunks)} chunks x {args.chunk_chars} chars, stub latency "
+          f"{args.latency_ms:.0f} ms + {args.us_per_token} us/token, "
+          f"429 p={args.rate_limit_prob}\n")
+
+    run_case(
+        "single request (previous)",
+        EmbeddingBatcher(client, MODEL, max_batch_tokens=10**9,
+                         max_batch_inputs=10**9, max_concurrency=1, max_retries=6),
+        chunks,
+    )
+    for concurrency in (1, 2, 4, 8):
+        run_case(
+            f"token batches, concurrency={concurrency}",
+            EmbeddingBatcher(client, MODEL, max_batch_tokens=args.batch_tokens,
+                             max_concurrency=concurrency, max_retries=6),
+            chunks,
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
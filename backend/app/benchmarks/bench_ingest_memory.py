@@ -0,0 +1,141 @@
+"""
+Peak RSS of ingesting one large file: whole-document vs streaming.
+
+The previous path read the upload into memory, built the full text and
+chunk list, then embedded everything in one go. The streaming path reads
+the file from disk, chunks lazily and embeds / stores fixed-size batches.
+Embedding is replaced by a fake that returns 1536-float vectors, so only
+memory held by the pipeline itself is measured. Each variant runs in its
+own subprocess so peak RSS is not shared between them.
+
+Run from backend/ (generates a text file of the given size if none given):
+    python -m app.benchmarks.bench_ingest_memory --mb 200
+    python -m app.benchmarks.bench_ingest_memory --file big.pdf
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+DIM = 1536
+BATCH_SIZE = 256
+
+
+def fake_embed(texts):
+    return [[random.random() for _ in range(DIM)] for _ in texts]
+
+
+# --------------------------------------------------
+# Variants
+# --------------------------------------------------
+def legacy(path: str) -> int:
+    from app.benchmarks.bench_parsing import load_pdf
+    from app.ingestion.text_splitter import chunk_text
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    if path.lower().endswith(".pdf"):
+        text, _ = load_pdf(raw)
+    else:
+        text = raw.decode("utf-8", errors="ignore").strip()
+
+    chunks = chunk_text(text)
+    vectors = fake_embed(chunks)
+    return len(vectors)
+
+
+def streaming(path: str) -> int:
+    from app.ingestion.pipeline import iter_file_chunks
+
+    stored = 0
+    batch = []
+    for chunk, _ in iter_file_chunks(os.path.basename(path), path):
+        batch.append(chunk)
+        if len(batch) >= BATCH_SIZE:
+            stored += len(fake_embed(batch))
+            batch = []
+    if batch:
+        stored += len(fake_embed(batch))
+    return stored
+
+
+VARIANTS = {"whole-document": legacy, "streaming": streaming}
+
+
+# --------------------------------------------------
+# Inputs
+# --------------------------------------------------
+def make_text(path: str, mb: int):
+    words = (
+        "micro small medium enterprise credit guarantee scheme turnover "
+        "investment plant machinery udyam registration subsidy"
+    ).split()
+    rng = random.Random(0)
+    target = mb * 1_000_000
+    with open(path, "w") as f:
+        written = 0
+        while written < target:
+            line = " ".join(rng.choice(words) for _ in range(80)) + "\n"
+            f.write(line)
+            written += len(line)
+
+
+# --------------------------------------------------
+# Runner
+# --------------------------------------------------
+def run_variant(variant: str, path: str):
+    import app.ingestion.pipeline  # noqa: F401
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    t0 = time.perf_counter()
+    chunks = VARIANTS[variant](path)
+    dt = time.perf_counter() - t0
+
+    print(json.dumps({
+        "seconds": dt,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "baseline_rss_mb": baseline_mb,
+        "chunks": chunks,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file")
+    parser.add_argument("--mb", type=int, default=50)
+    parser.add_argument("--_run", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._run:
+        run_variant(*args._run)
+        return
+
+    path = args.file
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "bench.txt")
+        make_text(path, args.mb)
+
+    print(f"\n{os.path.getsize(path) / 1e6:.1f} MB ({path})")
+    for variant in VARIANTS:
+        out = subprocess.run(
+            [sys.executable, "-m", "app.benchmarks.bench_ingest_memory",
+             "--_run", variant, path],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"  {variant:<15} {r['seconds']:>7.2f} s | peak RSS {r['peak_rss_mb']:>8.1f} MB "
+            f"(+{r['peak_rss_mb'] - r['baseline_rss_mb']:.1f} over imports) "
+            f"| {r['chunks']} chunks"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Matryoshka two-stage search: recall@k and latency vs the full-width scan.
+
+The first pass scans only the first N dims of every vector (re-normalised,
+optionally int8-quantized); the best rescore_factor * k rows are then
+rescored with the full float32 vectors. Compared with the full-width exact
+ExactIndex on the same held-out queries:
+  - resident MB of the first-pass data
+  - recall@k of the ids vs the full-width top-k
+  - mean latency per query
+
+Use real vectors (--conversation N, or 0 for the whole collection):
+random vectors have no Matryoshka structure, so the synthetic fallback
+concentrates variance in the leading dims (--decay) to approximate it.
+
+Run from backend/:
+    python -m app.benchmarks.bench_matryoshka --conversation 12
+    python -m app.benchmarks.bench_matryoshka --synthetic 50000 --prefix 128 256 512
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.benchmarks.bench_vector_quantization import from_chroma, synthetic
+from app.vectorstore.exact_index import ExactIndex
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversation", type=int)
+    parser.add_argument("--synthetic", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--decay", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--prefix", type=int, nargs="+", default=[128, 256, 512])
+    parser.add_argument("--factors", type=int, nargs="+", default=[4, 10])
+    parser.add_argument("--int8", action="store_true", help="also quantize the prefix")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.conversation is not None:
+        vectors = from_chroma(args.conversation)
+        source = f"Chroma ({'all' if not args.conversation else f'conversation {args.conversation}'})"
+    else:
+        vectors = synthetic(args.synthetic, args.dim, rng, decay=args.decay)
+        source = f"synthetic (decay={args.decay})"
+
+    picks = rng.choice(len(vectors), size=min(args.queries, len(vectors) // 2), replace=False)
+    queries = vectors[picks] + 0.01 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    corpus = np.delete(vectors, picks, axis=0)
+    k = min(args.k, len(corpus))
+
+    print(f"\n{source}: {len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, k={k}\n")
+
+    workdir = tempfile.mkdtemp(prefix="bench_mrl_")
+    path = os.path.join(workdir, "index")
+    builder = ExactIndex()
+    builder.add([str(i) for i in range(len(corpus))], corpus)
+    builder.save(path)
+
+    def run(index):
+        index.search_many([queries[0]], k)  # warm the mapping
+        t0 = time.perf_counter()
+        out = [index.search_many([q], k)[0][0] for q in queries]
+        return out, (time.perf_counter() - t0) * 1000 / len(queries)
+
+    baseline = ExactIndex.load(path)
+    reference, base_ms = run(baseline)
+    base_mb = baseline.resident_bytes() / 2**20
+    print(f"  {'full ' + str(corpus.shape[1]):<22} resident {base_mb:>7.1f} MB              recall@{k} 1.000 | {base_ms:>6.2f} ms/query")
+
+    quantization = "int8" if args.int8 else "none"
+    for dims in args.prefix:
+        for factor in args.factors:
+            index = ExactIndex.load(path, quantization, factor, prefix_dims=dims)
+            got, ms = run(index)
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(got, reference)])
+            mb = index.resident_bytes() / 2**20
+            label = f"prefix {dims}{' int8' if args.int8 else ''} x{factor}"
+            print(
+                f"  {label:<22} resident {mb:>7.1f} MB ({base_mb / mb:>4.1f}x smaller) "
+                f"recall@{k} {recall:.3f} | {ms:>6.2f} ms/query"
+            )
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Wall time and peak RSS: single-pass parsing vs the previous loaders.
+
+The previous PDF path parsed the bytes with PyPDF2 for text and again with
+pdfplumber for tables; DOCX built two `docx.Document`s. Each variant runs
+in its own subprocess so peak RSS is not shared between them; the
+median of --repeat runs is reported.
+
+Run from backend/ (generates a text + table PDF/DOCX if none given):
+    python -m app.benchmarks.bench_parsing --pages 60
+    python -m app.benchmarks.bench_parsing --file some.pdf
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+
+# --------------------------------------------------
+# Previous loaders (kept here for comparison only)
+# --------------------------------------------------
+def legacy_pdf(data: bytes):
+    import pdfplumber
+    from PyPDF2 import PdfReader
+
+    text = "\n".join(p.extract_text() or "" for p in PdfReader(BytesIO(data)).pages)
+
+    tables = []
+    with pdfplumber.open(BytesIO(data)) as pdf:
+        for page in pdf.pages[:10]:
+            for table in page.extract_tables() or []:
+                if table and len(table) >= 2:
+                    tables.append(table)
+    return text, tables
+
+
+def legacy_docx(data: bytes):
+    import docx
+
+    document = docx.Document(BytesIO(data))
+    text = "\n".join(p.text for p in document.paragraphs)
+    tables = [
+        [[c.text for c in row.cells] for row in t.rows]
+        for t in docx.Document(BytesIO(data)).tables
+    ]
+    return text, tables
+
+
+def load_pdf(source: str | bytes):
+    """
+    Whole-document text plus all tables from the single-pass page stream
+    (OCR'd pages marked as the old whole-text loader did).
+    """
+    from app.ingestion.loaders import iter_pdf_pages
+
+    parts, tables = [], []
+    for page in iter_pdf_pages(source):
+        tables.extend(page["tables"])
+        if page["ocr"]:
+            if page["text"]:
+                parts.append(f"\n\n--- Page {page['page']} ---\n{page['text']}")
+        else:
+            parts.append(page["text"])
+    return "\n".join(parts).strip(), tables
+
+
+def single_pass_pdf(data: bytes):
+    return load_pdf(data)
+
+
+def single_pass_docx(data: bytes):
+    from app.ingestion.loaders import load_docx
+
+    return load_docx(data)
+
+
+VARIANTS = {
+    "pdf": {"legacy": legacy_pdf, "single-pass": single_pass_pdf},
+    "docx": {"legacy": legacy_docx, "single-pass": single_pass_docx},
+}
+
+
+# --------------------------------------------------
+# Synthetic inputs
+# --------------------------------------------------
+def make_pdf(pages: int) -> bytes:
+    """
+    Minimal PDF: paragraphs of text plus a ruled 6x4 table on every page.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # pages tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+
+    for p in range(pages):
+        ops = ["BT /F1 10 Tf 50 780 Td 14 TL"]
+        for line in range(25):
+            ops.append(
+                f"(Page {p + 1} line {line}: micro small medium enterprise credit "
+                f"guarantee scheme turnover limit) '"
+            )
+        ops.append("ET")
+
+        x0, y0, cw, rh = 50, 200, 120, 20
+        for r in range(7):
+            ops.append(f"{x0} {y0 + r * rh} m {x0 + 4 * cw} {y0 + r * rh} l S")
+        for c in range(5):
+            ops.append(f"{x0 + c * cw} {y0} m {x0 + c * cw} {y0 + 6 * rh} l S")
+        for r in range(6):
+            for c in range(4):
+                cell = "Header" if r == 5 else f"r{r}c{c}p{p + 1}"
+                ops.append(
+                    f"BT /F1 9 Tf {x0 + c * cw + 5} {y0 + r * rh + 6} Td ({cell}) Tj ET"
+                )
+
+        stream = "\n".join(ops).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + obj + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref)
+    )
+    return out.getvalue()
+
+
+def make_docx(pages: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for p in range(pages):
+        for line in range(25):
+            document.add_paragraph(
+                f"Section {p + 1} line {line}: micro small medium enterprise credit"
+            )
+        table = document.add_table(rows=6, cols=4)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = "Header" if r == 0 else f"r{r}c{c}s{p + 1}"
+
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+# --------------------------------------------------
+# Runner
+# --------------------------------------------------
+def run_variant(kind: str, variant: str, path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # Same imports for every variant, outside the timed region
+    import docx, pdfplumber, PyPDF2, pypdfium2  # noqa: F401
+    import app.ingestion.loaders, app.ingestion.pipeline  # noqa: F401
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    fn = VARIANTS[kind][variant]
+    t0 = time.perf_counter()
+    text, tables = fn(data)
+    dt = time.perf_counter() - t0
+
+    print(json.dumps({
+        "seconds": dt,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "baseline_rss_mb": baseline_mb,
+        "text_chars": len(text),
+        "tables": len(tables),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file")
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--_run", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._run:
+        run_variant(*args._run)
+        return
+
+    inputs = []
+    if args.file:
+        kind = "docx" if args.file.lower().endswith(".docx") else "pdf"
+        inputs.append((kind, args.file))
+    else:
+        tmp = tempfile.mkdtemp()
+        for kind, make in (("pdf", make_pdf), ("docx", make_docx)):
+            path = os.path.join(tmp, f"bench.{kind}")
+            with open(path, "wb") as f:
+                f.write(make(args.pages))
+            inputs.append((kind, path))
+
+    for kind, path in inputs:
+        print(f"\n{kind.upper()} {os.path.getsize(path) / 1e6:.2f} MB ({path})")
+        for variant in VARIANTS[kind]:
+            runs = []
+            for _ in range(max(1, args.repeat)):
+                out = subprocess.run(
+                    [sys.executable, "-m", "app.benchmarks.bench_parsing",
+                     "--_run", kind, variant, path],
+                    capture_output=True, text=True, check=True,
+                )
+                runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            r = runs[-1]
+            seconds = statistics.median(x["seconds"] for x in runs)
+            growth = statistics.median(x["peak_rss_mb"] - x["baseline_rss_mb"] for x in runs)
+            print(
+                f"  {variant:<12} {seconds:>7.2f} s | peak RSS {r['peak_rss_mb']:>7.1f} MB "
+                f"(+{growth:.1f} over imports) "
+                f"| {r['text_chars']} chars, {r['tables']} tables"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Latency of /query/stream under N simultaneous streams.
+
+Fires `--requests` streaming queries at a running backend with at most N
+in flight, and reports time-to-first-byte and full-stream latency
+percentiles for each concurrency level.
+
+Run from backend/ against a server with an ingested conversation:
+    python -m app.benchmarks.bench_query_concurrency \\
+        --url http://127.0.0.1:8000 --conversation-id 1 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+
+async def one_stream(client: httpx.AsyncClient, url: str, payload: dict):
+    t0 = time.perf_counter()
+    ttfb = None
+    async with client.stream("POST", url, json=payload) as response:
+        response.raise_for_status()
+        async for _ in response.aiter_bytes():
+            if ttfb is None:
+                ttfb = time.perf_counter() - t0
+    return ttfb or 0.0, time.perf_counter() - t0
+
+
+async def run_level(args, concurrency: int):
+    url = f"{args.url.rstrip('/')}/query/stream"
+    payload = {"query": args.query, "conversation_id": args.conversation_id}
+    sem = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        async def guarded():
+            async with sem:
+                return await one_stream(client, url, payload)
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            *(guarded() for _ in range(args.requests)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - t0
+
+    ok = [r for r in results if not isinstance(r, BaseException)]
+    errors = len(results) - len(ok)
+    if not ok:
+        print(f"  N={concurrency:<4} all {errors} requests failed: {results[0]!r}")
+        return
+
+    ttfb = np.array([r[0] for r in ok]) * 1000
+    total = np.array([r[1] for r in ok]) * 1000
+
+    print(
+        f"  N={concurrency:<4} "
+        f"ttfb p50={np.percentile(ttfb, 50):>7.0f} p99={np.percentile(ttfb, 99):>7.0f} ms | "
+        f"total p50={np.percentile(total, 50):>7.0f} p99={np.percentile(total, 99):>7.0f} ms | "
+        f"{len(ok) / wall:>5.1f} req/s | errors={errors}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--conversation-id", type=int, required=True)
+    parser.add_argument("--query", default="What is the definition of a micro enterprise?")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    print(f"\n{args.requests} requests per level → {args.url}\n")
+    for n in args.concurrency:
+        await run_level(args, n)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
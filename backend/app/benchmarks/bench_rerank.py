@@ -0,0 +1,137 @@
+"""
+Reranker backends: pairs/s and ranking agreement with the PyTorch model.
+
+For each MSME eval question the candidate set is the conversation's
+BM25 top-N (no OpenAI calls needed); questions whose conversation has no
+chunks fall back to synthetic passages. Each backend is measured:
+  - sequential: one predict() per request
+  - concurrent: --clients threads issuing requests at once, direct and
+    through the micro-batching scheduler
+and its scores are compared with the torch backend per query (Kendall
+tau, top-5 overlap, max |score diff|).
+
+Run from backend/ (export the ONNX model first, see rerank_backends):
+    python -m app.benchmarks.bench_rerank --candidates 40 --clients 8
+"""
+
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.stats import kendalltau
+
+from app.config import settings
+from app.resources import build_rerank_backend
+from app.retrieval.rerank_scheduler import MicroBatcher
+
+EVAL_PATH = "app/evals/eval_cases_msme.json"
+
+
+def synthetic_passages(n: int, rng: random.Random) -> list[str]:
+    words = (
+        "micro small medium enterprise credit guarantee scheme loan subsidy "
+        "eligible units apply registration udyam turnover investment bank "
+        "collateral ministry marketing assistance technology upgradation"
+    ).split()
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(30, 180)))
+        for _ in range(n)
+    ]
+
+
+def load_requests(n_candidates: int) -> list[list[tuple[str, str]]]:
+    from app.retrieval.hybrid import bm25_retrieve
+
+    rng = random.Random(0)
+    with open(EVAL_PATH, encoding="utf-8") as f:
+        cases = json.load(f)
+
+    requests = []
+    for case in cases:
+        try:
+            texts = [c.text for c in bm25_retrieve(case["question"], case["conversation_id"], k=n_candidates)]
+        except Exception:
+            texts = []
+        if not texts:
+            texts = synthetic_passages(n_candidates, rng)
+        requests.append([(case["question"], t) for t in texts])
+    return requests
+
+
+def run_sequential(scorer, requests):
+    t0 = time.perf_counter()
+    scores = [scorer.predict(r) for r in requests]
+    return scores, time.perf_counter() - t0
+
+
+def run_concurrent(scorer, requests, clients: int, rounds: int):
+    work = requests * rounds
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(scorer.predict, work))
+    return time.perf_counter() - t0
+
+
+def agreement(reference, scores):
+    taus, overlaps, diffs = [], [], []
+    for ref, got in zip(reference, scores):
+        taus.append(kendalltau(ref, got).statistic)
+        top_ref = set(np.argsort(-ref)[:5])
+        top_got = set(np.argsort(-got)[:5])
+        overlaps.append(len(top_ref & top_got) / max(1, len(top_ref)))
+        diffs.append(float(np.max(np.abs(ref - got))))
+    return np.nanmean(taus), np.mean(overlaps), np.max(diffs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--candidates", type=int, default=40)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    requests = load_requests(args.candidates)
+    n_pairs = sum(len(r) for r in requests)
+    print(f"\n{len(requests)} requests, {n_pairs} pairs\n")
+
+    reference = None
+    for name in args.backends:
+        try:
+            backend = build_rerank_backend(name)
+        except Exception as e:
+            print(f"  {name:<6} unavailable: {type(e).__name__}: {e}")
+            continue
+
+        backend.predict(requests[0][:4])  # warm-up
+        scores, seq_s = run_sequential(backend, requests)
+        direct_s = run_concurrent(backend, requests, args.clients, args.rounds)
+        batcher = MicroBatcher(
+            backend,
+            max_batch_pairs=settings.RERANK_MAX_BATCH_PAIRS,
+            max_wait_ms=settings.RERANK_MAX_WAIT_MS,
+        )
+        batched_s = run_concurrent(batcher, requests, args.clients, args.rounds)
+
+        total = n_pairs * args.rounds
+        line = (
+            f"  {name:<6} sequential {n_pairs / seq_s:>7.0f} pairs/s | "
+            f"{args.clients} clients direct {total / direct_s:>7.0f} pairs/s, "
+            f"micro-batched {total / batched_s:>7.0f} pairs/s "
+            f"({batcher.requests / max(1, batcher.batches):.1f} req/forward)"
+        )
+
+        if reference is None:
+            reference = scores
+            line += " | reference"
+        else:
+            tau, overlap, diff = agreement(reference, scores)
+            line += f" | tau={tau:.3f} top5={overlap:.2f} max|d|={diff:.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
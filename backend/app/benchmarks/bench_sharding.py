@@ -0,0 +1,99 @@
+"""
+Per-conversation query latency as the number of conversations grows,
+for each Chroma layout (see store.shard_name):
+  - none:         one "documents" collection, filtered by conversation_id
+  - bucket:       CHROMA_SHARD_BUCKETS shared shards, filtered
+  - conversation: one collection per conversation, unfiltered
+
+Conversations of --chunks random vectors are added in steps up to each
+--steps total. After each step the same probe conversations are queried
+in every layout and the p50 latency is reported. The Chroma path is
+measured directly; the in-process exact index (EXACT_SEARCH_MAX_CHUNKS)
+would bypass it for conversations this small.
+
+Run from backend/:
+    python -m app.benchmarks.bench_sharding --steps 10 100 500 --chunks 100
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.vectorstore.store import SHARD_LAYOUTS, shard_name
+
+
+def add_conversation(client, layout: str, conversation_id: int, vectors: np.ndarray):
+    collection = client.get_or_create_collection(shard_name(conversation_id, layout))
+    collection.add(
+        ids=[f"{conversation_id}_bench_{i}" for i in range(len(vectors))],
+        embeddings=vectors.tolist(),
+        metadatas=[{"conversation_id": conversation_id}] * len(vectors),
+    )
+
+
+def p50_query_ms(client, layout: str, probes: list[int], queries: np.ndarray, k: int) -> float:
+    times = []
+    for conversation_id in probes:
+        collection = client.get_collection(shard_name(conversation_id, layout))
+        where = None if layout == "conversation" else {"conversation_id": conversation_id}
+        for q in queries:
+            t0 = time.perf_counter()
+            collection.query(
+                query_embeddings=[q.tolist()],
+                n_results=k,
+                where=where,
+                include=["distances"],
+            )
+            times.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--chunks", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=5)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    import chromadb
+
+    rng = np.random.default_rng(0)
+    workdir = tempfile.mkdtemp(prefix="bench_shards_")
+    client = chromadb.PersistentClient(path=workdir)
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    probes = list(range(args.probes))
+
+    print(
+        f"\n{args.chunks} chunks/conversation, dim={args.dim}, "
+        f"{settings.CHROMA_SHARD_BUCKETS} buckets, p50 over "
+        f"{args.probes} conversations x {args.queries} queries\n"
+    )
+    print(f"  {'conversations':>13} | " + " | ".join(f"{layout:>12}" for layout in SHARD_LAYOUTS))
+
+    added = 0
+    for total in args.steps:
+        for conversation_id in range(added, total):
+            vectors = rng.standard_normal((args.chunks, args.dim)).astype(np.float32)
+            for layout in SHARD_LAYOUTS:
+                add_conversation(client, layout, conversation_id, vectors)
+        added = max(added, total)
+
+        row = [
+            p50_query_ms(client, layout, probes, queries, min(args.k, args.chunks))
+            for layout in SHARD_LAYOUTS
+        ]
+        print(f"  {added:>13} | " + " | ".join(f"{ms:>9.2f} ms" for ms in row))
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cold-start cost of the API: import time and RSS per worker process.
+
+"lazy" imports app.main as uvicorn would; heavy resources are built on
+first use. "eager" imports it and immediately builds every resource via
+resources.warm_up() (Chroma client, OpenAI clients, DB tables and,
+with --reranker, the cross-encoder), which is what importing the app
+used to do. Each variant runs in a fresh subprocess, several times.
+
+Run from backend/ (needs the usual env: OPENAI_API_KEY, CHROMA_DB_PATH, ...):
+    python -m app.benchmarks.bench_startup --repeat 5
+    python -m app.benchmarks.bench_startup --reranker
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def run_variant(variant: str, reranker: bool):
+    t0 = time.perf_counter()
+    import app.main  # noqa: F401
+    import_s = time.perf_counter() - t0
+
+    warm_s = 0.0
+    if variant == "eager":
+        from app.resources import warm_up
+
+        t1 = time.perf_counter()
+        warm_up(include_reranker=reranker)
+        warm_s = time.perf_counter() - t1
+
+    print(json.dumps({
+        "import_s": import_s,
+        "warm_s": warm_s,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "modules": len(sys.modules),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--reranker", action="store_true")
+    parser.add_argument("--_run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._run:
+        run_variant(args._run, args.reranker)
+        return
+
+    print(f"\nimport app.main, {args.repeat} fresh processes per variant\n")
+    for variant in ("lazy", "eager"):
+        runs = []
+        for _ in range(args.repeat):
+            cmd = [sys.executable, "-m", "app.benchmarks.bench_startup", "--_run", variant]
+            if args.reranker:
+                cmd.append("--reranker")
+            out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+        ready = np.array([r["import_s"] + r["warm_s"] for r in runs])
+        rss = np.array([r["rss_mb"] for r in runs])
+        print(
+            f"  {variant:<6} ready in p50={np.median(ready):.2f} s "
+            f"(import {np.median([r['import_s'] for r in runs]):.2f} s) | "
+            f"RSS {np.median(rss):.0f} MB | {runs[-1]['modules']} modules"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Quantized exact index: resident memory and recall@k vs float32.
+
+Vectors come from Chroma (--conversation, or with --conversation 0 the
+whole collection conversation 0 maps to: every chunk when unsharded) or, without a Chroma
+store, from a synthetic clustered set of the embedding width. For each quantization
+mode and rescore factor the ExactIndex is saved, reloaded from disk as
+the app would load it, and queried with held-out vectors; results are
+compared with the float32 index:
+  - resident MB of the first-pass data (codes + scales + norms)
+  - recall@k of the ids vs exact float32 top-k
+  - mean latency per query
+
+Run from backend/:
+    python -m app.benchmarks.bench_vector_quantization --conversation 12
+    python -m app.benchmarks.bench_vector_quantization --synthetic 50000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.vectorstore.exact_index import ExactIndex
+
+
+def synthetic(n: int, dim: int, rng, decay: float = 0.0) -> np.ndarray:
+    """
+    Clustered unit vectors (closer to real embeddings than pure noise).
+    decay > 0 concentrates variance in the leading dims, the way
+    Matryoshka-trained embeddings do: dim i is scaled by (1 + i/64)^-decay.
+    """
+    centers = rng.standard_normal((max(1, n // 200), dim)).astype(np.float32)
+    v = centers[rng.integers(0, len(centers), n)]
+    v += 0.6 * rng.standard_normal((n, dim)).astype(np.float32) / np.sqrt(dim) * np.linalg.norm(centers[0])
+    if decay:
+        v *= ((1 + np.arange(dim) / 64) ** -decay).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def from_chroma(conversation_id: int) -> np.ndarray:
+    from app.vectorstore.store import _get, _where
+
+    data = _get(
+        conversation_id,
+        where=_where(conversation_id) if conversation_id else None,
+        include=["embeddings"],
+    )
+    return np.asarray(data["embeddings"], dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversation", type=int)
+    parser.add_argument("--synthetic", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.conversation is not None:
+        vectors = from_chroma(args.conversation)
+        source = f"Chroma ({'all' if not args.conversation else f'conversation {args.conversation}'})"
+    else:
+        vectors = synthetic(args.synthetic, args.dim, rng)
+        source = "synthetic"
+
+    # Held-out rows (slightly perturbed) serve as queries
+    picks = rng.choice(len(vectors), size=min(args.queries, len(vectors) // 2), replace=False)
+    queries = vectors[picks] + 0.01 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    corpus = np.delete(vectors, picks, axis=0)
+    ids = [str(i) for i in range(len(corpus))]
+    k = min(args.k, len(corpus))
+
+    print(f"\n{source}: {len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, k={k}\n")
+
+    workdir = tempfile.mkdtemp(prefix="bench_quant_")
+    path = os.path.join(workdir, "index")
+    builder = ExactIndex()
+    builder.add(ids, corpus)
+    builder.save(path)
+
+    def run(index):
+        t0 = time.perf_counter()
+        out = [index.search_many([q], k)[0][0] for q in queries]
+        return out, (time.perf_counter() - t0) * 1000 / len(queries)
+
+    baseline = ExactIndex.load(path)
+    reference, base_ms = run(baseline)
+    base_mb = baseline.resident_bytes() / 2**20
+    print(f"  {'float32':<8}          resident {base_mb:>8.1f} MB            recall@{k} 1.000 | {base_ms:>6.2f} ms/query")
+
+    for mode in ("float16", "int8"):
+        for factor in args.factors:
+            index = ExactIndex.load(path, mode, factor)
+            got, ms = run(index)
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(got, reference)])
+            mb = index.resident_bytes() / 2**20
+            print(
+                f"  {mode:<8} rescore x{factor:<2} resident {mb:>8.1f} MB "
+                f"({base_mb / mb:>4.1f}x smaller) recall@{k} {recall:.3f} | {ms:>6.2f} ms/query"
+            )
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Dense search latency: shared Chroma collection vs the in-process exact index.
+
+Builds a throwaway Chroma collection laid out like ours (every
+conversation in one "documents" collection, filtered by conversation_id),
+with --background chunks from other conversations, plus a few probe
+conversations of increasing size. Each probe is searched both ways with
+the same query vectors:
+  - chroma: filtered HNSW query (what dense_search did before)
+  - exact:  ExactIndex loaded from its memory-mapped snapshot
+and Chroma's top-k is compared with the exact top-k (recall@k).
+Vectors are random unit vectors of the embedding model's width; no
+OpenAI calls are made.
+
+Run from backend/:
+    python -m app.benchmarks.bench_vector_search --background 50000 --sizes 200 2000 10000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.vectorstore.exact_index import ExactIndex
+
+
+def unit_vectors(rng, n: int, dim: int) -> np.ndarray:
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def add(collection, conversation_id: int, vectors: np.ndarray, batch: int = 2000):
+    for s in range(0, len(vectors), batch):
+        part = vectors[s : s + batch]
+        collection.add(
+            ids=[f"{conversation_id}_bench_{i}" for i in range(s, s + len(part))],
+            embeddings=part.tolist(),
+            metadatas=[{"conversation_id": conversation_id}] * len(part),
+        )
+
+
+def p50_ms(fn, queries, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            times.append((time.perf_counter() - t0) * 1000)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--background", type=int, default=50_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 10_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import chromadb
+
+    rng = np.random.default_rng(0)
+    workdir = tempfile.mkdtemp(prefix="bench_vectors_")
+    collection = chromadb.PersistentClient(path=workdir).get_or_create_collection("documents")
+
+    print(f"\nBackground: {args.background} chunks over 100 conversations, dim={args.dim}")
+    t0 = time.perf_counter()
+    per_conv = max(1, args.background // 100)
+    for cid in range(1000, 1100):
+        add(collection, cid, unit_vectors(rng, per_conv, args.dim))
+    print(f"  built in {time.perf_counter() - t0:.0f} s\n")
+
+    queries = unit_vectors(rng, args.queries, args.dim)
+
+    for cid, size in enumerate(args.sizes, start=1):
+        vectors = unit_vectors(rng, size, args.dim)
+        add(collection, cid, vectors)
+
+        path = os.path.join(workdir, f"exact_{cid}")
+        index = ExactIndex()
+        index.add([f"{cid}_bench_{i}" for i in range(size)], vectors)
+        index.save(path)
+        index = ExactIndex.load(path)
+
+        k = min(args.k, size)
+
+        def chroma(q):
+            return collection.query(
+                query_embeddings=[q.tolist()],
+                n_results=k,
+                where={"conversation_id": cid},
+                include=["distances"],
+            )["ids"][0]
+
+        def exact(q):
+            return index.search_many([q], k)[0][0]
+
+        recall = np.mean([
+            len(set(chroma(q)) & set(exact(q))) / k for q in queries
+        ])
+        chroma_ms = p50_ms(chroma, queries, args.repeat)
+        exact_ms = p50_ms(exact, queries, args.repeat)
+
+        print(
+            f"  {size:>6} chunks | chroma p50 {chroma_ms:>7.2f} ms | "
+            f"exact p50 {exact_ms:>6.2f} ms ({chroma_ms / exact_ms:>5.1f}x) | "
+            f"chroma recall@{k} vs exact {recall:.3f}"
+        )
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    print()
+
+
+if __name__ == "__main__":
+    main()
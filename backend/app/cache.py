@@ -0,0 +1,107 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class PersistentLRUCache:
+    """
+    Bounded in-memory LRU in front of a SQLite key/value table.
+
+    Values are raw bytes; callers own the encoding. Memory holds at most
+    `capacity` entries, disk holds everything ever written.
+    """
+
+    def __init__(self, path: str, table: str, capacity: int = 2048):
+        self.table = table
+        self.capacity = capacity
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, value: bytes):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        found: dict[str, bytes] = {}
+
+        with self._lock:
+            pending = []
+            for key in keys:
+                value = self._memory.get(key)
+                if value is None:
+                    pending.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                found[key] = value
+                self.hits += 1
+
+            if pending:
+                unique = list(dict.fromkeys(pending))
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(unique), 500):
+                    batch = unique[i : i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, value FROM {self.table} "
+                        f"WHERE key IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ).fetchall()
+                    for key, value in rows:
+                        self._remember(key, value)
+
+                for key in pending:
+                    value = self._memory.get(key)
+                    if value is None:
+                        self.misses += 1
+                    else:
+                        found[key] = value
+                        self.disk_hits += 1
+
+        return found
+
+    def get(self, key: str) -> bytes | None:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: dict[str, bytes]):
+        if not items:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                list(items.items()),
+            )
+            self._conn.commit()
+            for key, value in items.items():
+                self._remember(key, value)
+
+    def put(self, key: str, value: bytes):
+        self.put_many({key: value})
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.hits + self.disk_hits) / lookups if lookups else 0.0
+                ),
+            }
@@ -1,3 +1,5 @@
+import os
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,6 +10,40 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     APP_NAME: str = "Multi_Source_RAG"
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+    CHUNK_EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100_000
+    EMBEDDING_BATCH_MAX_INPUTS: int = 2048
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_MAX_RETRIES: int = 6
+    RETRIEVAL_WORKERS: int = 8
+    RERANK_MODEL: str = "mixedbread-ai/mxbai-rerank-xsmall-v1"
+    RERANK_BACKEND: str = "torch"  # "torch" | "onnx"
+    RERANK_ONNX_DIR: str = "./models/mxbai-rerank-xsmall-v1-onnx-int8"
+    RERANK_BATCH_SIZE: int = 32
+    RERANK_MAX_LENGTH: int = 512
+    RERANK_MAX_BATCH_PAIRS: int = 256
+    RERANK_MAX_WAIT_MS: float = 5.0
+    RERANK_SCORE_CACHE_SIZE: int = 20_000
+    RERANK_CASCADE_HEAD: int = 15
+    RERANK_CASCADE_MARGIN: float = 0.15
+    WARM_UP_ON_STARTUP: bool = True
+    WARM_UP_RERANKER: bool = False
+    HYDRATED_CHUNK_CACHE_SIZE: int = 1024
+    LEXICAL_INDEX_CACHE_SIZE: int = 256  # conversations with BM25 matrices in memory
+    CHROMA_SHARDING: str = "none"  # "none" | "bucket" | "conversation"
+    CHROMA_SHARD_BUCKETS: int = 64
+    EXACT_SEARCH_MAX_CHUNKS: int = 20_000  # 0 = always Chroma
+    EXACT_INDEX_CACHE_SIZE: int = 64  # conversations with exact indexes in memory
+    VECTOR_QUANTIZATION: str = "none"  # "none" | "float16" (memory only, slower) | "int8"
+    VECTOR_RESCORE_FACTOR: int = 4
+    VECTOR_PREFIX_DIMS: int = 0  # Matryoshka first pass, e.g. 256; 0 = full width
+    INGEST_WORKERS: int = 2
+    INGEST_MAX_CONCURRENT_JOBS: int = 4
+    INGEST_BATCH_SIZE: int = 256
+    INGEST_SPOOL_DIR: str | None = None
+    CHUNK_MAX_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 32
 
     class Config:
         env_file = ".env"
@@ -17,3 +53,13 @@ class Settings(BaseSettings):
 settings = Settings()
 
 DB_URL = settings.POSTGRES_URL or settings.POSTGRES_URL_LOCAL
+
+
+def data_path(*parts: str) -> str:
+    """
+    Path for derived on-disk state (indexes, caches).
+    Lives under CHROMA_DB_PATH so it shares the same persistent volume.
+    """
+    path = os.path.join(settings.CHROMA_DB_PATH, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
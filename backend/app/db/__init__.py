@@ -1,4 +1,6 @@
 from app.db.session import engine
 from app.db.models import Base
 
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+
+def init_db():
+    Base.metadata.create_all(bind=engine)
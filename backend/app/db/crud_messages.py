@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.models import Conversation, Message
 
@@ -51,3 +53,62 @@ def get_recent_messages(
     )
 
     return list(reversed(messages))
+
+
+# --------------------------------------------------
+# Async variants (used by the streaming query path)
+# --------------------------------------------------
+async def get_conversation_async(
+    db: AsyncSession,
+    conversation_id: int,
+):
+    return await db.get(Conversation, conversation_id)
+
+
+async def create_conversation_async(
+    db: AsyncSession,
+    title: str | None = None,
+):
+    convo = Conversation(title=title)
+    db.add(convo)
+    await db.commit()
+    await db.refresh(convo)
+    return convo
+
+
+async def add_message_async(
+    db: AsyncSession,
+    conversation_id: int,
+    role: str,
+    content: str,
+    meta: dict | None = None,
+):
+    msg = Message(
+        conversation_id=conversation_id,
+        role=role,
+        content=content,
+        meta=meta,
+    )
+
+    db.add(msg)
+    await db.commit()
+    await db.refresh(msg)
+    return msg
+
+
+async def get_recent_messages_async(
+    db: AsyncSession,
+    conversation_id: int,
+    limit: int = 10,
+):
+    """
+    Async get_recent_messages: oldest → newest, last `limit` messages.
+    """
+    result = await db.execute(
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at.desc())
+        .limit(limit)
+    )
+
+    return list(reversed(result.scalars().all()))
@@ -1,8 +1,30 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker,declarative_base
 from app.config import DB_URL
 
+
+def _async_url(url: str) -> str:
+    """
+    Same database, async driver (asyncpg for Postgres).
+    """
+    scheme, rest = url.split("://", 1)
+    driver = {
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+        "postgres": "postgresql+asyncpg",
+        "sqlite": "sqlite+aiosqlite",
+    }.get(scheme, scheme)
+    return f"{driver}://{rest}"
+
+
 engine=create_engine(DB_URL)
 SessionLocal=sessionmaker(autocommit=False,autoflush=False,bind=engine)
 Base=declarative_base()
 
+async_engine = create_async_engine(_async_url(DB_URL))
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
@@ -1,12 +1,16 @@
+import argparse
 import json
 import time
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
+
 from app.retrieval.dense import dense_retrieve
 from app.retrieval.hybrid import hybrid_retrieve
 from app.retrieval.multiquery import multiquery_search
-from app.retrieval.rerank import rerank
+from app.retrieval.rerank import rerank, rerank_cascade
+from app.resources import rerank_score_cache
 
 EVAL_PATH = Path(__file__).parent / "eval_cases_msme.json"
 OUT_DIR = Path(__file__).parent / "results"
@@ -21,8 +25,23 @@ PIPELINES = {
         multiquery_search(q, cid, k=10, num_queries=4),
         top_k=5
     ),
+    "multiquery+cascade@5": lambda q, cid: rerank_cascade(
+        q,
+        multiquery_search(q, cid, k=10, num_queries=4),
+        top_k=5
+    ),
 }
 
+# (head, margin) variants for --cascade-sweep; margin=inf never exits early
+CASCADE_VARIANTS = [
+    (10, float("inf")),
+    (15, float("inf")),
+    (20, float("inf")),
+    (15, 0.15),
+    (15, 0.05),
+    (10, 0.05),
+]
+
 
 def contains_keywords(texts, keywords):
     joined = "\n".join(texts).lower()
@@ -62,8 +81,8 @@ def run():
 
             dt = (time.time() - t0) * 1000
 
-            texts = [d.get("text", "") for d in docs]
-            sources = [d.get("source", "unknown") for d in docs]
+            texts = [d.text for d in docs]
+            sources = [d.source for d in docs]
 
             kw = contains_keywords(texts, case["expected_keywords"])
 
@@ -80,9 +99,85 @@ def run():
 
         print()
 
+    json.dump(results, out_file.open("w"), indent=2)
+    print(f"\n✅ Saved results to {out_file}")
+    print(f"📦 Rerank score cache: {rerank_score_cache().stats()}\n")
+
+
+def cascade_sweep():
+    """
+    Recall vs latency of rerank_cascade against the full rerank, on the
+    same multiquery candidates per case (retrieved once) with the score
+    cache bypassed so every variant pays for its cross-encoder pairs.
+    """
+    evals = json.loads(EVAL_PATH.read_text())
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_file = OUT_DIR / f"msme_cascade_{ts}.json"
+
+    cases = []
+    for case in evals:
+        try:
+            docs = multiquery_search(case["question"], case["conversation_id"], k=10, num_queries=4)
+        except Exception as e:
+            print(f"  ❌ {case['name']} retrieval failed: {e}")
+            continue
+        cases.append((case, docs))
+
+    print(f"\n✅ Cases with candidates: {len(cases)}")
+    print(f"📍 Variants: full rerank + {len(CASCADE_VARIANTS)} cascades\n")
+
+    def measure(fn):
+        rows = []
+        for case, docs in cases:
+            trace = {}
+            t0 = time.perf_counter()
+            out = fn(case["question"], docs, trace)
+            dt = (time.perf_counter() - t0) * 1000
+            rows.append({
+                "case": case["name"],
+                "latency_ms": round(dt, 1),
+                "keywords_ok": contains_keywords([d.text for d in out], case["expected_keywords"]),
+                "ids": [d.id for d in out],
+                "pairs_scored": trace.get("pairs_scored", len(docs)),
+                "early_exit": trace.get("early_exit", False),
+            })
+        return rows
+
+    results = {
+        "full": measure(lambda q, docs, trace: rerank(q, docs, top_k=5, use_cache=False)),
+    }
+    for head, margin in CASCADE_VARIANTS:
+        results[f"cascade h={head} m={margin}"] = measure(
+            lambda q, docs, trace, head=head, margin=margin: rerank_cascade(
+                q, docs, top_k=5, head=head, margin=margin, use_cache=False, trace=trace
+            )
+        )
+
+    reference = {r["case"]: set(r["ids"]) for r in results["full"]}
+    for name, rows in results.items():
+        overlap = np.mean([
+            len(set(r["ids"]) & reference[r["case"]]) / max(1, len(reference[r["case"]]))
+            for r in rows
+        ]) if rows else 0.0
+        print(
+            f"  {name:<26} "
+            f"kw={np.mean([r['keywords_ok'] for r in rows] or [0]):.2f} | "
+            f"top5 vs full={overlap:.2f} | "
+            f"p50={np.median([r['latency_ms'] for r in rows] or [0]):>6.1f} ms | "
+            f"pairs/q={np.mean([r['pairs_scored'] for r in rows] or [0]):>5.1f} | "
+            f"early exits={sum(r['early_exit'] for r in rows)}"
+        )
+
     json.dump(results, out_file.open("w"), indent=2)
     print(f"\n✅ Saved results to {out_file}\n")
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cascade-sweep", action="store_true")
+    args = parser.parse_args()
+
+    if args.cascade_sweep:
+        cascade_sweep()
+    else:
+        run()
@@ -0,0 +1,274 @@
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from app.config import settings
+from app.ingestion.pipeline import (
+    IngestError,
+    extract_file,
+    extract_url,
+    iter_spool,
+    iter_spool_tables,
+)
+from app.llm.embeddings import embed_chunks
+from app.resources import table_store
+from app.vectorstore.store import (
+    add_chunks,
+    flush_indexes,
+    hold_indexes,
+    release_indexes,
+)
+
+# Keep finished jobs around for polling, but not forever
+_MAX_TRACKED_JOBS = 1000
+_FINISHED = ("done", "failed", "partial")
+
+
+class IngestJobs:
+    """
+    Background ingestion.
+
+    CPU-heavy extraction (parsing, table extraction, OCR, chunking) runs in
+    a process pool and streams chunks to a spool file on disk. Job threads
+    in this process then read the spool in fixed-size batches, keeping up
+    to EMBEDDING_MAX_CONCURRENCY batches being embedded while earlier ones
+    are written, so memory is bounded by a few batches rather than the
+    document size. Chroma writes stay in
+    this process since its persistent client is not safe to share across
+    processes.
+    """
+
+    def __init__(self, workers: int, max_jobs: int):
+        self.workers = workers
+        self.max_jobs = max_jobs
+
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._runner: ThreadPoolExecutor | None = None
+
+    def _pools(self):
+        with self._lock:
+            if self._process_pool is None:
+                # spawn: the API process has live threads (Chroma, uvicorn)
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._runner = ThreadPoolExecutor(
+                    max_workers=self.max_jobs,
+                    thread_name_prefix="ingest",
+                )
+            return self._process_pool, self._runner
+
+    # --------------------------------------------------
+    # Job state
+    # --------------------------------------------------
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else {**job, "timings": dict(job["timings"])}
+
+    def _create(self, conversation_id: int, source: str) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "conversation_id": conversation_id,
+                "source": source,
+                "status": "queued",
+                "stage": "queued",
+                "chunks": 0,
+                "chunks_stored": 0,
+                "tables": 0,
+                "timings": {},
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            # Oldest finished jobs first; queued/running jobs are never dropped
+            excess = len(self._jobs) - _MAX_TRACKED_JOBS
+            if excess > 0:
+                finished = [
+                    jid for jid, job in self._jobs.items()
+                    if job["status"] in _FINISHED
+                ]
+                for jid in finished[:excess]:
+                    del self._jobs[jid]
+        return job_id
+
+    # --------------------------------------------------
+    # Submission
+    # --------------------------------------------------
+    def submit_file(self, conversation_id: int, filename: str, path: str) -> str:
+        """
+        Ingest a spooled upload; the job takes ownership of `path`.
+        """
+        job_id = self._create(conversation_id, filename)
+        _, runner = self._pools()
+        runner.submit(
+            self._run, job_id, conversation_id, filename, [path],
+            partial(
+                extract_file,
+                table_scope=str(conversation_id),
+                # Each extraction process gets its share of the cores for OCR
+                ocr_workers=max(1, (os.cpu_count() or 1) // settings.INGEST_WORKERS),
+            ),
+            filename, path,
+        )
+        return job_id
+
+    def submit_url(self, conversation_id: int, url: str) -> str:
+        job_id = self._create(conversation_id, url)
+        _, runner = self._pools()
+        runner.submit(
+            self._run, job_id, conversation_id, url, [],
+            extract_url, url,
+        )
+        return job_id
+
+    # --------------------------------------------------
+    # Execution
+    # --------------------------------------------------
+    def _timed(self, job_id: str, stage: str, fn, *args):
+        """
+        Run one step of `stage`; timings accumulate across batches.
+        """
+        self._update(job_id, stage=stage)
+        t0 = time.perf_counter()
+        result = fn(*args)
+        with self._lock:
+            timings = self._jobs[job_id]["timings"]
+            timings[stage] = round(timings.get(stage, 0.0) + time.perf_counter() - t0, 3)
+        return result
+
+    def _batches(self, spool_path: str):
+        texts, metas = [], []
+        for text, meta in iter_spool(spool_path):
+            texts.append(text)
+            metas.append(meta)
+            if len(texts) >= settings.INGEST_BATCH_SIZE:
+                yield texts, metas
+                texts, metas = [], []
+        if texts:
+            yield texts, metas
+
+    def _failed(self, job_id: str, stored: int, error: str):
+        """
+        Chunks stored before the failure stay searchable; the job reports
+        "partial" so the client knows. Chunk ids are stable, so re-submitting
+        the same document fills in the rest without duplicating them.
+        """
+        self._update(job_id, status="partial" if stored else "failed", error=error)
+
+    def _run(self, job_id, conversation_id, doc_id, owned_paths, extract, *args):
+        owned_paths = list(owned_paths)
+        stored = 0
+        held = False
+
+        try:
+            process_pool, _ = self._pools()
+            self._update(job_id, status="running")
+
+            fd, spool_path = tempfile.mkstemp(
+                suffix=".jsonl", dir=settings.INGEST_SPOOL_DIR
+            )
+            os.close(fd)
+            owned_paths.append(spool_path)
+
+            extracted = self._timed(
+                job_id, "parsing",
+                lambda: process_pool.submit(
+                    extract,
+                    *args,
+                    spool_path,
+                    max_tokens=settings.CHUNK_MAX_TOKENS,
+                    overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+                    model=settings.EMBEDDING_MODEL,
+                ).result(),
+            )
+            self._update(job_id, chunks=extracted["chunks"], tables=extracted["tables"])
+
+            if extracted["tables"]:
+                self._timed(
+                    job_id, "storing",
+                    table_store().put_many, conversation_id, iter_spool_tables(spool_path),
+                )
+
+            # Embedding requests for the next batches are in flight while
+            # the current one is written, so the embedding API sees up to
+            # EMBEDDING_MAX_CONCURRENCY requests instead of one at a time.
+            hold_indexes(conversation_id)
+            held = True
+            depth = max(1, settings.EMBEDDING_MAX_CONCURRENCY)
+            in_flight = deque()
+            embedder = ThreadPoolExecutor(max_workers=depth, thread_name_prefix="ingest-embed")
+
+            def store_oldest():
+                nonlocal stored
+                texts, metas, future = in_flight.popleft()
+                vectors = self._timed(job_id, "embedding", future.result)
+                self._timed(
+                    job_id, "storing",
+                    lambda: add_chunks(
+                        doc_id,
+                        texts,
+                        vectors,
+                        metas,
+                        conversation_id=conversation_id,
+                        start_index=stored,
+                        persist=False,
+                    ),
+                )
+                stored += len(texts)
+                self._update(job_id, chunks_stored=stored)
+
+            try:
+                for texts, metas in self._batches(spool_path):
+                    in_flight.append((texts, metas, embedder.submit(embed_chunks, texts)))
+                    if len(in_flight) >= depth:
+                        store_oldest()
+                while in_flight:
+                    store_oldest()
+            finally:
+                embedder.shutdown(cancel_futures=True)
+
+            self._update(job_id, status="done", stage="done")
+
+        except IngestError as e:
+            self._failed(job_id, stored, str(e))
+
+        except Exception as e:
+            logging.exception(f"[ingest] job {job_id} failed")
+            self._failed(job_id, stored, f"{type(e).__name__}: {e}")
+
+        finally:
+            try:
+                if stored:
+                    flush_indexes(conversation_id)
+            finally:
+                if held:
+                    release_indexes(conversation_id)
+            for path in owned_paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._update(job_id, finished_at=time.time())
+
+
+jobs = IngestJobs(
+    workers=settings.INGEST_WORKERS,
+    max_jobs=settings.INGEST_MAX_CONCURRENT_JOBS,
+)
@@ -0,0 +1,216 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, Iterator, List, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+import docx
+import pdfplumber
+import pypdfium2
+
+from PIL import Image, ImageEnhance, ImageFilter
+import pytesseract
+
+# --------------------------------------------------
+# Loaders
+# --------------------------------------------------
+def _clean_rows(rows) -> List[List[str]]:
+    return [
+        [(c or "").strip().replace("\n", " ") for c in row]
+        for row in rows
+    ]
+
+
+def _file_like(source: str | bytes):
+    """
+    Loaders accept a path (spooled upload, read from disk) or raw bytes.
+    """
+    return source if isinstance(source, str) else BytesIO(source)
+
+
+def load_docx(source: str | bytes) -> Tuple[str, List[Dict]]:
+    """
+    Paragraph text and structured tables from a single parse.
+    """
+    document = docx.Document(_file_like(source))
+    text = "\n".join(p.text for p in document.paragraphs)
+
+    tables = []
+    for t_index, table in enumerate(document.tables):
+        rows = _clean_rows([cell.text for cell in row.cells] for row in table.rows)
+
+        if len(rows) < 2:
+            continue
+
+        tables.append(
+            {
+                "title": f"DOCX TABLE {t_index + 1}",
+                "rows": rows,
+            }
+        )
+
+    return text, tables
+
+
+def iter_pdf_pages(
+    source: str | bytes,
+    max_table_pages: int = 10,
+    max_ocr_pages: int = 15,
+    ocr_dpi: int = 300,
+    ocr_workers: int | None = None,
+) -> Iterator[Dict]:
+    """
+    Single pass over a PDF, yielding one dict per page, in order:
+        {"page": n, "text": str, "tables": [...], "ocr": bool}
+
+    Each page is parsed once. Pages in the table window go through
+    pdfplumber, which yields text and tables from the same layout. The
+    remaining pages use pdfium's text layer, which is much faster. Pages
+    with no text layer are rendered from the already-open pdfium document
+    and OCR'd in parallel while later pages keep parsing.
+    """
+    pending: deque = deque()
+    ocr_pages = 0
+
+    def ready():
+        while pending and (
+            pending[0]["_ocr"] is None or pending[0]["_ocr"].done()
+        ):
+            page = pending.popleft()
+            future = page.pop("_ocr")
+            if future is not None:
+                page["text"] = future.result()
+            yield page
+
+    # Both parsers read lazily from the file when given a path
+    pdfium_doc = pypdfium2.PdfDocument(source)
+    try:
+        with pdfplumber.open(_file_like(source)) as pdf, OcrPool(ocr_workers) as ocr:
+            for p_index in range(len(pdfium_doc)):
+                tables = []
+
+                if p_index < max_table_pages:
+                    page = pdf.pages[p_index]
+                    text = page.extract_text() or ""
+                    for t_index, table in enumerate(page.extract_tables() or []):
+                        if not table or len(table) < 2:
+                            continue
+                        tables.append(
+                            {
+                                "title": f"PDF TABLE (Page {p_index + 1}, Table {t_index + 1})",
+                                "rows": _clean_rows(table),
+                                "page": p_index + 1,
+                            }
+                        )
+                    page.close()
+                else:
+                    textpage = pdfium_doc[p_index].get_textpage()
+                    text = textpage.get_text_range().replace("\r\n", "\n")
+                    textpage.close()
+
+                future = None
+                if not text.strip() and ocr_pages < max_ocr_pages:
+                    image = pdfium_doc[p_index].render(scale=ocr_dpi / 72).to_pil()
+                    future = ocr.submit(image)
+                    ocr_pages += 1
+
+                pending.append(
+                    {
+                        "page": p_index + 1,
+                        "text": text,
+                        "tables": tables,
+                        "ocr": future is not None,
+                        "_ocr": future,
+                    }
+                )
+
+                yield from ready()
+
+                # Bound look-ahead so rendered pages don't pile up
+                while len(pending) > ocr.max_in_flight:
+                    pending[0]["_ocr"].result()
+                    yield from ready()
+
+            while pending:
+                if pending[0]["_ocr"] is not None:
+                    pending[0]["_ocr"].result()
+                yield from ready()
+    finally:
+        pdfium_doc.close()
+
+
+def load_web_page(url: str) -> str:
+    response = requests.get(url, timeout=15)
+    response.raise_for_status()
+
+    soup = BeautifulSoup(response.text, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.extract()
+
+    text = soup.get_text(separator="\n")
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+# --------------------------------------------------
+# OCR helpers
+# --------------------------------------------------
+def preprocess_for_ocr(img: Image.Image) -> Image.Image:
+    img = img.convert("L")
+    img = ImageEnhance.Contrast(img).enhance(2.0)
+    img = img.filter(ImageFilter.SHARPEN)
+
+    w, h = img.size
+    img = img.resize((w * 2, h * 2))
+
+    return img
+
+
+def ocr_image(img: Image.Image) -> str:
+    img = preprocess_for_ocr(img)
+    return pytesseract.image_to_string(
+        img, config="--oem 3 --psm 6"
+    ).strip()
+
+
+def load_image_ocr(source: str | bytes) -> str:
+    with Image.open(_file_like(source)) as img:
+        return ocr_image(img.convert("RGB"))
+
+
+def _init_ocr_worker():
+    # One tesseract thread per worker; parallelism comes from the pool
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+class OcrPool:
+    """
+    Process pool for page OCR, started on first use, with `workers`
+    processes (default: every core). It runs inside each extraction
+    process, so ingestion passes each one its share of the cores.
+    Each task carries one page image, so memory stays about one page per
+    worker plus a bounded look-ahead.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_in_flight = 2 * self.workers
+        self._pool: ProcessPoolExecutor | None = None
+
+    def submit(self, img: Image.Image):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker,
+            )
+        return self._pool.submit(ocr_image, img)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
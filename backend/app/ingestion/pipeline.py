@@ -0,0 +1,230 @@
+import hashlib
+import json
+from typing import Callable, Dict, Iterator, Tuple
+
+# Parser libraries (app.ingestion.loaders) are imported inside the
+# functions that use them: the API process only needs the spool readers
+# below, and parsing happens in worker processes.
+from app.ingestion.text_splitter import iter_token_chunks
+from app.ingestion.table_utils import make_table_json, table_to_row_chunks
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt", ".png", ".jpg", ".jpeg")
+
+# Text files are decoded and chunked this many bytes at a time
+_TEXT_READ_SIZE = 1 << 20
+
+
+class IngestError(Exception):
+    """
+    Document could not be turned into chunks (reported back to the client).
+    """
+
+
+# --------------------------------------------------
+# Page / text streams
+# --------------------------------------------------
+def iter_pdf_page_texts(pages) -> Iterator[Tuple[int, str]]:
+    for page in pages:
+        if page["text"]:
+            yield page["page"], page["text"]
+
+
+def iter_text_file(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        first = True
+        while piece := f.read(_TEXT_READ_SIZE):
+            if first:
+                piece = piece.lstrip()
+                first = False
+            yield piece
+
+
+# --------------------------------------------------
+# Extraction (parsing + OCR + chunking)
+# Runs inside ingestion worker processes: keep it free of
+# Chroma / OpenAI / settings imports.
+# --------------------------------------------------
+def _text_chunk_meta(source: str, chunk: Dict) -> Dict:
+    meta = {
+        "source": source,
+        "type": "text",
+        "tokens": chunk["tokens"],
+        "char_start": chunk["char_start"],
+        "char_end": chunk["char_end"],
+    }
+    if chunk["page_start"] is not None:
+        meta["page_start"] = chunk["page_start"]
+        meta["page_end"] = chunk["page_end"]
+    return meta
+
+
+def iter_file_chunks(
+    filename: str,
+    path: str,
+    stats: Dict | None = None,
+    on_table: Callable[[str, str], None] | None = None,
+    table_scope: str = "",
+    ocr_workers: int | None = None,
+    **chunking,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    (chunk, metadata) pairs for a file on disk, produced lazily:
+    pages -> token-sized chunks (with page / offset provenance), then
+    table rows. `chunking` is passed through to iter_token_chunks.
+
+    Row chunks reference their table by `table_id`; the table body (JSON)
+    is handed to `on_table(table_id, body)` instead of being copied into
+    every row's metadata. `stats["tables"]` counts tables that produced rows.
+    Table ids hash (table_scope, filename, body), so ingesting the same
+    document into the same conversation again reuses them. `ocr_workers`
+    sizes the PDF OCR pool.
+    """
+    from app.ingestion.loaders import iter_pdf_pages, load_docx, load_image_ocr
+
+    name = filename.lower()
+    tables: list[Dict] = []
+
+    if name.endswith(".pdf"):
+        def pages():
+            for page in iter_pdf_pages(path, ocr_workers=ocr_workers):
+                tables.extend(page["tables"])
+                yield page
+
+        texts = iter_pdf_page_texts(pages())
+
+    elif name.endswith(".docx"):
+        text, tables = load_docx(path)
+        texts = iter([(None, text)])
+
+    elif name.endswith(".txt"):
+        texts = ((None, piece) for piece in iter_text_file(path))
+
+    elif name.endswith((".png", ".jpg", ".jpeg")):
+        texts = iter([(None, load_image_ocr(path))])
+
+    else:
+        raise IngestError("Unsupported file type")
+
+    for chunk in iter_token_chunks(texts, **chunking):
+        yield chunk["text"], _text_chunk_meta(filename, chunk)
+
+    for table in tables:
+        table_json = make_table_json(table["title"], table["rows"])
+        if not table_json:
+            continue
+
+        if stats is not None:
+            stats["tables"] = stats.get("tables", 0) + 1
+
+        body = json.dumps(table_json, ensure_ascii=False)
+        table_id = hashlib.sha256(
+            f"{table_scope}\0{filename}\0{body}".encode("utf-8")
+        ).hexdigest()[:32]
+        if on_table is not None:
+            on_table(table_id, body)
+
+        meta = {
+            "source": filename,
+            "type": "table_row",
+            "table_id": table_id,
+            "table_title": table_json.get("title", ""),
+        }
+        if "page" in table:
+            meta["page"] = table["page"]
+
+        for row, rc in enumerate(table_to_row_chunks(table_json)):
+            yield rc, {**meta, "row": row}
+
+
+# --------------------------------------------------
+# Spool files: one JSON object per line, either a chunk
+#   {"text": ..., "meta": {...}}
+# or a table body referenced by row chunks
+#   {"table_id": ..., "body": "<table JSON>"}
+# --------------------------------------------------
+class _Spool:
+    def __init__(self, spool_path: str):
+        self._out = open(spool_path, "w", encoding="utf-8")
+        self.chunks = 0
+
+    def add_table(self, table_id: str, body: str):
+        self._out.write(json.dumps({"table_id": table_id, "body": body}, ensure_ascii=False))
+        self._out.write("\n")
+
+    def add_chunks(self, records: Iterator[Tuple[str, Dict]]):
+        for text, meta in records:
+            if not text.strip():
+                continue
+            self._out.write(json.dumps({"text": text, "meta": meta}, ensure_ascii=False))
+            self._out.write("\n")
+            self.chunks += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._out.close()
+
+
+def extract_file(
+    filename: str,
+    path: str,
+    spool_path: str,
+    table_scope: str = "",
+    ocr_workers: int | None = None,
+    **chunking,
+) -> Dict:
+    """
+    Write a file's chunks and tables to `spool_path`; return counts.
+    `table_scope` (the conversation id) keeps table ids per conversation.
+    """
+    stats = {"tables": 0}
+    with _Spool(spool_path) as spool:
+        spool.add_chunks(
+            iter_file_chunks(
+                filename, path, stats, spool.add_table, table_scope,
+                ocr_workers, **chunking,
+            )
+        )
+
+    if not spool.chunks:
+        raise IngestError("No text extracted from file")
+
+    return {"chunks": spool.chunks, "tables": stats["tables"]}
+
+
+def extract_url(url: str, spool_path: str, **chunking) -> Dict:
+    from app.ingestion.loaders import load_web_page
+
+    text = load_web_page(url)
+    if not text:
+        raise IngestError("No text extracted from URL")
+
+    chunks = iter_token_chunks([(None, text)], **chunking)
+    with _Spool(spool_path) as spool:
+        spool.add_chunks((c["text"], _text_chunk_meta(url, c)) for c in chunks)
+
+    return {"chunks": spool.chunks, "tables": 0}
+
+
+def iter_spool(spool_path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    (chunk, metadata) records, in the order they were written.
+    """
+    with open(spool_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith('{"table_id"'):
+                continue
+            record = json.loads(line)
+            yield record["text"], record["meta"]
+
+
+def iter_spool_tables(spool_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    (table_id, body JSON) records.
+    """
+    with open(spool_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith('{"table_id"'):
+                record = json.loads(line)
+                yield record["table_id"], record["body"]
@@ -1,3 +1,9 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from app.llm.tokens import count_tokens_batch
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 800,
@@ -19,3 +25,238 @@ def chunk_text(
         start = end - overlap
 
     return chunks
+
+
+# --------------------------------------------------
+# Token-aware streaming chunker
+# --------------------------------------------------
+# Paragraph break (blank line) or sentence end followed by whitespace
+_BOUNDARY = re.compile(r"\n[ \t]*\n\s*|(?<=[.!?])\s+")
+_WORD = re.compile(r"\S+\s*")
+
+# Unterminated text carried between blocks of the same page is cut at a
+# word boundary beyond this size (text with no sentence punctuation)
+_MAX_CARRY = 1 << 16
+
+
+class _Unit:
+    """
+    A sentence (or a piece of an over-long one) with its provenance.
+    `sep` is the whitespace that followed it in the source.
+    """
+
+    __slots__ = ("text", "sep", "page", "start", "end", "tokens", "para_end")
+
+    def __init__(self, text, sep, page, start, tokens, para_end):
+        self.text = text
+        self.sep = sep
+        self.page = page
+        self.start = start
+        self.end = start + len(text)
+        self.tokens = tokens
+        self.para_end = para_end
+
+
+def _segment(text: str, page, base: int) -> Tuple[List[Tuple], str, int]:
+    """
+    Split `text` at sentence / paragraph boundaries.
+    Returns complete (text, sep, page, start, para_end) pieces, plus the
+    trailing unterminated piece and its offset (it may continue in the
+    next input for the same page).
+    """
+    pieces = []
+    prev = 0
+    for m in _BOUNDARY.finditer(text):
+        raw = text[prev:m.start()]
+        stripped = raw.lstrip()
+        if stripped:
+            sep = m.group()
+            pieces.append(
+                (
+                    stripped,
+                    "\n\n" if sep.count("\n") >= 2 else " ",
+                    page,
+                    base + prev + len(raw) - len(stripped),
+                    sep.count("\n") >= 2,
+                )
+            )
+        prev = m.end()
+    return pieces, text[prev:], base + prev
+
+
+class _Window:
+    """
+    Packs units into chunks of at most `max_tokens`, carrying up to
+    `overlap_tokens` of trailing sentences into the next chunk. A chunk
+    that is already `snap_tokens` long is closed at the next paragraph end.
+    """
+
+    def __init__(self, max_tokens: int, overlap_tokens: int, snap_tokens: int):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.snap_tokens = snap_tokens
+        self.units: List[_Unit] = []
+        self.tokens = 0
+        # Units at the front that were already emitted (overlap)
+        self.carried = 0
+
+    def _emit(self) -> Dict:
+        units = self.units
+        parts = []
+        for u in units[:-1]:
+            parts.append(u.text)
+            parts.append(u.sep)
+        parts.append(units[-1].text)
+        return {
+            "text": "".join(parts),
+            "tokens": self.tokens,
+            "page_start": units[0].page,
+            "page_end": units[-1].page,
+            "char_start": units[0].start,
+            "char_end": units[-1].end,
+        }
+
+    def _restart(self, overlap: bool):
+        if not overlap:
+            self.units, self.tokens, self.carried = [], 0, 0
+            return
+
+        tail, tokens = [], 0
+        for u in reversed(self.units[1:]):
+            if tokens + u.tokens > self.overlap_tokens:
+                break
+            tail.append(u)
+            tokens += u.tokens
+        tail.reverse()
+        self.units, self.tokens, self.carried = tail, tokens, len(tail)
+
+    def push(self, unit: _Unit) -> Iterator[Dict]:
+        while self.units and self.tokens + unit.tokens > self.max_tokens:
+            if len(self.units) > self.carried:
+                yield self._emit()
+                self._restart(overlap=True)
+            else:
+                # Overlap alone leaves no room: drop it from the front
+                dropped = self.units.pop(0)
+                self.tokens -= dropped.tokens
+                self.carried -= 1
+
+        self.units.append(unit)
+        self.tokens += unit.tokens
+
+        if unit.para_end and self.tokens >= self.snap_tokens:
+            yield self._emit()
+            self._restart(overlap=False)
+
+    def flush(self) -> Iterator[Dict]:
+        if len(self.units) > self.carried:
+            yield self._emit()
+        self._restart(overlap=False)
+
+
+def _split_long(piece: Tuple, max_tokens: int, model: str) -> Iterator[_Unit]:
+    """
+    Break a sentence longer than `max_tokens` at word boundaries
+    (and a single over-long word by characters).
+    """
+    text, sep, page, start, para_end = piece
+    words = [(m.group(), m.start()) for m in _WORD.finditer(text)]
+    counts = count_tokens_batch([w for w, _ in words], model)
+
+    buf_start, buf_tokens, buf_end = None, 0, 0
+    for (word, offset), n in zip(words, counts):
+        if n > max_tokens:
+            if buf_start is not None:
+                yield _Unit(text[buf_start:buf_end].rstrip(), " ", page, start + buf_start, buf_tokens, False)
+                buf_start, buf_tokens = None, 0
+            step = max(1, len(word) * max_tokens // n)
+            for i in range(0, len(word.rstrip()), step):
+                part = word[i:i + step].rstrip()
+                if part:
+                    yield _Unit(part, " ", page, start + offset + i, count_tokens_batch([part], model)[0], False)
+            continue
+
+        if buf_start is not None and buf_tokens + n > max_tokens:
+            yield _Unit(text[buf_start:buf_end].rstrip(), " ", page, start + buf_start, buf_tokens, False)
+            buf_start, buf_tokens = None, 0
+
+        if buf_start is None:
+            buf_start = offset
+        buf_tokens += n
+        buf_end = offset + len(word)
+
+    if buf_start is not None:
+        yield _Unit(text[buf_start:buf_end].rstrip(), sep, page, start + buf_start, buf_tokens, para_end)
+
+
+def iter_token_chunks(
+    pages: Iterable[Tuple[int | None, str]],
+    max_tokens: int = 256,
+    overlap_tokens: int = 32,
+    model: str = "text-embedding-3-small",
+) -> Iterator[Dict]:
+    """
+    Lazily chunk a stream of (page, text) pieces into dicts:
+        {"text", "tokens", "page_start", "page_end", "char_start", "char_end"}
+
+    Chunks hold at most `max_tokens` embedding-model tokens, break only
+    at sentence or paragraph boundaries (unless a single sentence is too
+    long), and repeat up to `overlap_tokens` of trailing sentences at the
+    start of the next chunk. Consecutive pieces with the same page are
+    treated as one continuous text, so large files can be fed in blocks
+    (page None). `char_start` is an offset into the text of `page_start`,
+    `char_end` into that of `page_end`.
+
+    Memory is one input piece plus one chunk window.
+    """
+    if overlap_tokens >= max_tokens:
+        overlap_tokens = max_tokens // 2
+
+    window = _Window(max_tokens, overlap_tokens, snap_tokens=max_tokens * 3 // 4)
+    carry, carry_page, carry_start = "", None, 0
+
+    def units(pieces):
+        counts = count_tokens_batch([p[0] for p in pieces], model)
+        for piece, n in zip(pieces, counts):
+            if n > max_tokens:
+                yield from _split_long(piece, max_tokens, model)
+            else:
+                yield _Unit(piece[0], piece[1], piece[2], piece[3], n, piece[4])
+
+    def close_carry():
+        text = carry.strip()
+        if not text:
+            return []
+        start = carry_start + len(carry) - len(carry.lstrip())
+        return [(text, "\n", carry_page, start, False)]
+
+    for page, text in pages:
+        if not text:
+            continue
+
+        if page == carry_page:
+            text = carry + text
+            base = carry_start
+        else:
+            for unit in units(close_carry()):
+                yield from window.push(unit)
+            base = 0
+
+        pieces, carry, carry_start = _segment(text, page, base)
+        carry_page = page
+
+        if len(carry) > _MAX_CARRY:
+            cut = carry.rfind(" ", 0, len(carry) - 1) + 1 or len(carry)
+            head = carry[:cut]
+            stripped = head.strip()
+            if stripped:
+                offset = carry_start + len(head) - len(head.lstrip())
+                pieces.append((stripped, " ", page, offset, False))
+            carry, carry_start = carry[cut:], carry_start + cut
+
+        for unit in units(pieces):
+            yield from window.push(unit)
+
+    for unit in units(close_carry()):
+        yield from window.push(unit)
+    yield from window.flush()
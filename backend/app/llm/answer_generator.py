@@ -1,7 +1,4 @@
-from openai import OpenAI
-from app.config import settings
-
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from app.resources import async_openai_client, openai_client
 
 # --------------------------------------------------
 # Context normalization
@@ -32,7 +29,7 @@ CRITICAL RULES:
 # --------------------------------------------------
 # STREAMING (PRIMARY & ONLY)
 # --------------------------------------------------
-def stream_answer(query, contexts, history):
+def _build_messages(query, contexts, history):
     contexts = _normalize_contexts(contexts)
     context_text = "\n\n".join(contexts)
 
@@ -45,10 +42,13 @@ def stream_answer(query, contexts, history):
         messages.append({"role": role, "content": content})
 
     messages.append({"role": "user", "content": query})
+    return messages
 
-    stream = client.chat.completions.create(
+
+def stream_answer(query, contexts, history):
+    stream = openai_client().chat.completions.create(
         model="gpt-4o-mini",
-        messages=messages,
+        messages=_build_messages(query, contexts, history),
         temperature=0.2,
         stream=True,
     )
@@ -56,3 +56,16 @@ def stream_answer(query, contexts, history):
     for chunk in stream:
         if chunk.choices and chunk.choices[0].delta.content:
             yield chunk.choices[0].delta.content
+
+
+async def stream_answer_async(query, contexts, history):
+    stream = await async_openai_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=_build_messages(query, contexts, history),
+        temperature=0.2,
+        stream=True,
+    )
+
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
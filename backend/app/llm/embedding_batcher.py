@@ -0,0 +1,105 @@
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from app.llm.tokens import count_tokens
+
+# 429s plus transient transport / server failures
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class EmbeddingBatcher:
+    """
+    Splits inputs into requests that respect the provider's per-request
+    token and input limits, sends them with bounded parallelism, retries
+    rate-limited (429) and transient failures with backoff, and returns
+    vectors in input order.
+    """
+
+    def __init__(
+        self,
+        client,
+        model: str,
+        max_batch_tokens: int = 100_000,
+        max_batch_inputs: int = 2048,
+        max_concurrency: int = 4,
+        max_retries: int = 6,
+    ):
+        self.client = client
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+
+    def split(self, texts: list[str]) -> list[list[str]]:
+        batches: list[list[str]] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        for text in texts:
+            n = count_tokens(text, self.model)
+            if current and (
+                current_tokens + n > self.max_batch_tokens
+                or len(current) >= self.max_batch_inputs
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+
+            current.append(text)
+            current_tokens += n
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+    def _embed_batch(self, batch: list[str]) -> list[list[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=batch,
+                )
+                return [item.embedding for item in response.data]
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logging.warning(
+                    f"[embeddings] {type(e).__name__}, retrying in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+                time.sleep(delay)
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        batches = self.split(texts)
+        if len(batches) == 1 or self.max_concurrency <= 1:
+            results = [self._embed_batch(b) for b in batches]
+        else:
+            workers = min(self.max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._embed_batch, batches))
+
+        return [vec for batch in results for vec in batch]
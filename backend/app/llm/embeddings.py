@@ -1,16 +1,145 @@
-from openai import OpenAI
+import asyncio
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+
+from app.cache import PersistentLRUCache
 from app.config import settings
+from app.resources import (
+    async_openai_client,
+    chunk_embedding_cache,
+    once,
+    openai_client,
+    query_embedding_cache,
+)
+
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+@once
+def get_batcher():
+    from app.llm.embedding_batcher import EmbeddingBatcher
+
+    return EmbeddingBatcher(
+        # Retries (including 429 backoff) are handled by the batcher;
+        # shares the connection pool of the app-wide client
+        openai_client().with_options(max_retries=0),
+        model=settings.EMBEDDING_MODEL,
+        max_batch_tokens=settings.EMBEDDING_BATCH_MAX_TOKENS,
+        max_batch_inputs=settings.EMBEDDING_BATCH_MAX_INPUTS,
+        max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY,
+        max_retries=settings.EMBEDDING_MAX_RETRIES,
+    )
 
 
 def embed(texts: list[str]):
     """
-    Returns a list of embedding vectors (one per input text)
+    Returns a list of embedding vectors (one per input text).
+    Large inputs are split into token-bounded requests sent concurrently.
     """
-    response = client.embeddings.create(
-        model=settings.EMBEDDING_MODEL,
-        input=texts,
+    return get_batcher().embed(texts)
+
+
+# --------------------------------------------------
+# Cached embeddings
+# --------------------------------------------------
+def _missing(keys: list[str], texts: list[str], cached: dict) -> dict[str, str]:
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+    return missing
+
+
+def _encode(keys, vectors) -> dict[str, bytes]:
+    return {
+        key: np.asarray(vec, dtype=np.float32).tobytes()
+        for key, vec in zip(keys, vectors)
+    }
+
+
+def _decode(keys: list[str], cached: dict[str, bytes]):
+    return [
+        np.frombuffer(cached[key], dtype=np.float32).tolist()
+        for key in keys
+    ]
+
+
+def _embed_cached(cache: PersistentLRUCache, keys: list[str], texts: list[str]):
+    """
+    Serve vectors from `cache`; embed each distinct miss once.
+    """
+    cached = cache.get_many(keys)
+
+    missing = _missing(keys, texts, cached)
+    if missing:
+        fresh = _encode(missing.keys(), embed(list(missing.values())))
+        cache.put_many(fresh)
+        cached.update(fresh)
+
+    return _decode(keys, cached)
+
+
+def _content_key(text: str) -> str:
+    raw = f"{settings.EMBEDDING_MODEL}\0{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def normalize_query(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def embed_queries(queries: list[str]):
+    """
+    Query embeddings keyed on (model, normalized text).
+    """
+    normalized = [normalize_query(q) for q in queries]
+    return _embed_cached(
+        query_embedding_cache(),
+        [_content_key(q) for q in normalized],
+        normalized,
     )
 
-    return [item.embedding for item in response.data]
+
+def embed_query(query: str):
+    return embed_queries([query])[0]
+
+
+async def embed_queries_async(queries: list[str]):
+    """
+    embed_queries() for the event loop: cache I/O runs in a thread,
+    misses go through the async client.
+    """
+    normalized = [normalize_query(q) for q in queries]
+    keys = [_content_key(q) for q in normalized]
+    cached = await asyncio.to_thread(query_embedding_cache().get_many, keys)
+
+    missing = _missing(keys, normalized, cached)
+    if missing:
+        # Query-time embeddings are single small requests; the SDK's own retries suffice
+        response = await async_openai_client().embeddings.create(
+            model=settings.EMBEDDING_MODEL,
+            input=list(missing.values()),
+        )
+        fresh = _encode(missing.keys(), [item.embedding for item in response.data])
+        await asyncio.to_thread(query_embedding_cache().put_many, fresh)
+        cached.update(fresh)
+
+    return _decode(keys, cached)
+
+
+async def embed_query_async(query: str):
+    return (await embed_queries_async([query]))[0]
+
+
+def embed_chunks(chunks: list[str]):
+    """
+    Chunk embeddings keyed on (model, exact chunk content), so the same
+    document ingested again, or repeated rows, are embedded only once.
+    """
+    return _embed_cached(
+        chunk_embedding_cache(),
+        [_content_key(c) for c in chunks],
+        chunks,
+    )
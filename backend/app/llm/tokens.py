@@ -0,0 +1,35 @@
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # BPE files are fetched on first use; offline hosts fall back to an estimate
+        logging.warning(f"[tokens] tiktoken unavailable, estimating counts: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    enc = _encoding(model)
+    if enc is None:
+        # ~3 chars/token errs on the high side for English text
+        return len(text) // 3 + 1
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def count_tokens_batch(texts: list[str], model: str) -> list[int]:
+    """
+    count_tokens for many texts at once (tiktoken encodes the batch in
+    parallel threads).
+    """
+    enc = _encoding(model)
+    if enc is None:
+        return [len(t) // 3 + 1 for t in texts]
+    return [len(ids) for ids in enc.encode_ordinary_batch(texts)]
@@ -4,12 +4,9 @@ Used only for multi-query retrieval experiments.
 Not part of the production pipeline.
 """
 
-from openai import OpenAI
-from app.config import settings
+from app.resources import openai_client
 import logging
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
 def generate_query_variations(query: str, n: int = 3):
     """
     Generate query rewrites for retrieval.
@@ -26,7 +23,7 @@ def generate_query_variations(query: str, n: int = 3):
     """
 
     try:
-        res = client.chat.completions.create(
+        res = openai_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "You rewrite queries for information retrieval."},
@@ -1,13 +1,33 @@
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
 from app.api import (
     routes_ingest,
     routes_query,
     routes_conversations,
 )
+from app.config import settings
+from app import resources
+
+# --------------------------------------------------
+# Startup: tables now, everything else lazily / in the background
+# --------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(resources.database)
+    if settings.WARM_UP_ON_STARTUP:
+        threading.Thread(
+            target=resources.warm_up, name="warm-up", daemon=True
+        ).start()
+    yield
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # --------------------------------------------------
 # CORS (local dev only)
@@ -33,8 +53,31 @@ app.include_router(routes_query.router)
 app.include_router(routes_conversations.router)
 
 # --------------------------------------------------
-# Health
+# Health / readiness
 # --------------------------------------------------
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Builds any resource not yet warmed, then reports per-resource status.
+    503 until all of them succeed.
+    """
+    report = await run_in_threadpool(resources.warm_up)
+    status = 200 if resources.is_ready() else 503
+    return JSONResponse({"ready": status == 200, "resources": report}, status_code=status)
+
+
+# --------------------------------------------------
+# Cache stats
+# --------------------------------------------------
+@app.get("/stats/cache")
+def cache_stats():
+    return {
+        "query_embeddings": resources.query_embedding_cache().stats(),
+        "chunk_embeddings": resources.chunk_embedding_cache().stats(),
+        "rerank_scores": resources.rerank_score_cache().stats(),
+    }
@@ -0,0 +1,203 @@
+"""
+Shared heavy resources, built on first use.
+
+Importing the app does not open Chroma, construct API clients, load the
+reranker model or touch the database. Each getter builds its resource
+once per process and returns the same instance afterwards; `warm_up()`
+builds them all ahead of the first request (readiness probes).
+"""
+
+import logging
+import threading
+import time
+from functools import wraps
+
+from app.config import data_path, settings
+
+
+def once(build):
+    """
+    Memoise a no-argument builder like lru_cache, but build under a lock:
+    callers racing on first use (a cold request vs warm_up, or several
+    pool threads) wait for one build instead of each running it. A build
+    that raises is retried on the next call.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @wraps(build)
+    def get():
+        if built:
+            return built[0]
+        with lock:
+            if not built:
+                built.append(build())
+        return built[0]
+
+    get.cache_clear = built.clear
+    return get
+
+
+@once
+def chroma_client():
+    import chromadb
+
+    return chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
+
+
+@once
+def openai_client():
+    from openai import OpenAI
+
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+@once
+def async_openai_client():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+def build_rerank_backend(name: str):
+    from app.retrieval.rerank_backends import OnnxCrossEncoder, TorchCrossEncoder
+
+    if name == "onnx":
+        return OnnxCrossEncoder(
+            settings.RERANK_ONNX_DIR,
+            batch_size=settings.RERANK_BATCH_SIZE,
+            max_length=settings.RERANK_MAX_LENGTH,
+        )
+    if name == "torch":
+        return TorchCrossEncoder(
+            settings.RERANK_MODEL,
+            batch_size=settings.RERANK_BATCH_SIZE,
+            max_length=settings.RERANK_MAX_LENGTH,
+        )
+    raise ValueError(f"Unknown RERANK_BACKEND: {name}")
+
+
+@once
+def reranker():
+    """
+    Configured cross-encoder backend behind the micro-batching scheduler
+    (RERANK_MAX_WAIT_MS=0 calls the backend directly).
+    """
+    from app.retrieval.rerank_scheduler import MicroBatcher
+
+    backend = build_rerank_backend(settings.RERANK_BACKEND)
+    if settings.RERANK_MAX_WAIT_MS <= 0:
+        return backend
+    return MicroBatcher(
+        backend,
+        max_batch_pairs=settings.RERANK_MAX_BATCH_PAIRS,
+        max_wait_ms=settings.RERANK_MAX_WAIT_MS,
+    )
+
+
+# --------------------------------------------------
+# On-disk caches and stores (SQLite under CHROMA_DB_PATH)
+# --------------------------------------------------
+@once
+def query_embedding_cache():
+    from app.cache import PersistentLRUCache
+
+    return PersistentLRUCache(
+        data_path("embedding_cache.sqlite"),
+        table="query_embeddings",
+        capacity=settings.QUERY_EMBEDDING_CACHE_SIZE,
+    )
+
+
+@once
+def chunk_embedding_cache():
+    from app.cache import PersistentLRUCache
+
+    return PersistentLRUCache(
+        data_path("embedding_cache.sqlite"),
+        table="chunk_embeddings",
+        capacity=settings.CHUNK_EMBEDDING_CACHE_SIZE,
+    )
+
+
+@once
+def rerank_score_cache():
+    # Chunk text never changes once ingested, so scores never go stale
+    from app.cache import PersistentLRUCache
+
+    return PersistentLRUCache(
+        data_path("rerank_cache.sqlite"),
+        table="rerank_scores",
+        capacity=settings.RERANK_SCORE_CACHE_SIZE,
+    )
+
+
+@once
+def table_store():
+    from app.vectorstore.table_store import TableStore
+
+    return TableStore(data_path("tables.sqlite"))
+
+
+@once
+def database():
+    """
+    Create missing tables (previously done on `import app.db`).
+    """
+    from app.db import init_db
+
+    init_db()
+    return True
+
+
+# --------------------------------------------------
+# Warm-up
+# --------------------------------------------------
+_WARM_UP = {
+    "database": database,
+    "chroma": lambda: chroma_client().heartbeat(),
+    "openai": lambda: (openai_client(), async_openai_client()),
+    "stores": lambda: (
+        query_embedding_cache(),
+        chunk_embedding_cache(),
+        rerank_score_cache(),
+        table_store(),
+    ),
+}
+
+_ready = threading.Event()
+_warm_up_lock = threading.Lock()
+_warm_up_report: dict = {}
+
+
+def warm_up(include_reranker: bool | None = None) -> dict:
+    """
+    Build every resource now. Returns per-resource seconds (or the error).
+    Safe to call repeatedly and from several threads.
+    """
+    if include_reranker is None:
+        include_reranker = settings.WARM_UP_RERANKER
+
+    steps = dict(_WARM_UP)
+    if include_reranker:
+        steps["reranker"] = reranker
+
+    with _warm_up_lock:
+        for name, fn in steps.items():
+            if name in _warm_up_report and "error" not in _warm_up_report[name]:
+                continue
+            t0 = time.perf_counter()
+            try:
+                fn()
+                _warm_up_report[name] = {"seconds": round(time.perf_counter() - t0, 3)}
+            except Exception as e:
+                logging.exception(f"[resources] warm-up of {name} failed")
+                _warm_up_report[name] = {"error": f"{type(e).__name__}: {e}"}
+
+        if all("error" not in r for r in _warm_up_report.values()):
+            _ready.set()
+        return dict(_warm_up_report)
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
@@ -0,0 +1,90 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# (chunk ids, scores) as returned by the first-phase searches
+Hits = Tuple[List[str], np.ndarray]
+
+EMPTY_HITS: Hits = ([], np.empty(0, dtype=np.float32))
+
+# Standard RRF damping constant
+RRF_K = 60
+
+
+class Candidate:
+    """
+    One retrieved chunk, keyed by its Chroma id.
+    `text` / `meta` are filled in by hydration, after ranking.
+    """
+
+    __slots__ = ("id", "score", "text", "meta")
+
+    def __init__(self, id: str, score: float, text: str = "", meta: Dict | None = None):
+        self.id = id
+        self.score = score
+        self.text = text
+        self.meta = meta
+
+    @property
+    def source(self) -> str:
+        return (self.meta or {}).get("source", "unknown")
+
+    def __repr__(self):
+        return f"Candidate({self.id!r}, score={self.score:.4f})"
+
+
+def top_k(ids: List[str], scores: np.ndarray, k: int) -> List[Candidate]:
+    """
+    Highest-scoring k as Candidates, best first.
+    """
+    if len(ids) > k:
+        idx = np.argpartition(-scores, k)[:k]
+    else:
+        idx = np.arange(len(ids))
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return [Candidate(ids[i], float(scores[i])) for i in idx]
+
+
+def fuse(
+    bm25: Hits,
+    dense: Hits,
+    k: int = 10,
+    alpha: float = 0.5,
+    method: str = "weighted",
+) -> List[Candidate]:
+    """
+    Fuse BM25 hits (higher is better) with dense hits (distance, lower
+    is better) over the union of their ids.
+
+    method="weighted": (1 - alpha) * max-normalised BM25
+                       + alpha * (1 - distance / max distance)
+    method="rrf":      (1 - alpha) / (RRF_K + bm25 rank)
+                       + alpha / (RRF_K + dense rank)
+    """
+    bm25_ids, bm25_scores = bm25
+    dense_ids, dense_dists = dense
+    if not bm25_ids and not dense_ids:
+        return []
+
+    ids = list(dict.fromkeys(bm25_ids + dense_ids))
+    position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    bm25_pos = np.fromiter((position[c] for c in bm25_ids), dtype=np.intp, count=len(bm25_ids))
+    dense_pos = np.fromiter((position[c] for c in dense_ids), dtype=np.intp, count=len(dense_ids))
+
+    fused = np.zeros(len(ids), dtype=np.float64)
+
+    if method == "rrf":
+        # Both hit lists arrive best-first
+        fused[bm25_pos] += (1 - alpha) / (RRF_K + 1 + np.arange(len(bm25_ids)))
+        fused[dense_pos] += alpha / (RRF_K + 1 + np.arange(len(dense_ids)))
+    elif method == "weighted":
+        if len(bm25_ids):
+            bm25_max = float(bm25_scores.max()) or 1.0
+            fused[bm25_pos] += (1 - alpha) * (bm25_scores / bm25_max)
+        if len(dense_ids):
+            dense_max = float(dense_dists.max()) or 1.0
+            fused[dense_pos] += alpha * (1.0 - dense_dists / dense_max)
+    else:
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    return top_k(ids, fused, k)
@@ -1,61 +1,34 @@
-from typing import List, Dict
-import json
+from typing import List
 
-from app.llm.embeddings import embed
-from app.vectorstore.store import get_collection
+from app.llm.embeddings import embed_query
+from app.retrieval.candidate import Candidate
+from app.vectorstore.store import get_chunk_count, get_chunks, search_vectors
+from app.vectorstore.table_store import hydrate_tables
 
 
 def dense_retrieve(
     query: str,
     conversation_id: int,
     k: int = 5,
-) -> List[Dict]:
+) -> List[Candidate]:
     """
     Dense retrieval scoped to a conversation.
-    score = Chroma distance (lower is better)
+    score = squared L2 distance (lower is better)
     """
 
-    collection = get_collection()
-
-    existing = collection.get(
-        where={"conversation_id": conversation_id},
-        include=["documents", "metadatas"],
-    )
-
-    if not existing.get("documents"):
+    count = get_chunk_count(conversation_id)
+    if not count:
         return []
 
-    query_vec = embed([query])[0]
-
-    res = collection.query(
-        query_embeddings=[query_vec],
-        n_results=k,
-        where={"conversation_id": conversation_id},
-        include=["documents", "metadatas", "distances"],
-    )
-
-    docs = []
-    for text, meta, score in zip(
-        res["documents"][0],
-        res["metadatas"][0],
-        res["distances"][0],
-    ):
-        meta = meta or {}
-
-        # Decode structured table JSON if stored as string
-        if isinstance(meta.get("table"), str):
-            try:
-                meta["table"] = json.loads(meta["table"])
-            except Exception:
-                pass
+    query_vec = embed_query(query)
+    ids, scores = search_vectors([query_vec], conversation_id, k=k)[0]
+    chunks = get_chunks(ids)
 
-        docs.append(
-            {
-                "text": text,
-                "source": meta.get("source", "unknown"),
-                "score": float(score),
-                "meta": meta,
-            }
-        )
+    docs = [
+        Candidate(chunk_id, float(score), *chunks[chunk_id])
+        for chunk_id, score in zip(ids, scores)
+        if chunk_id in chunks
+    ]
 
-    return docs
+    # Structured tables only for the rows actually returned
+    return hydrate_tables(docs)
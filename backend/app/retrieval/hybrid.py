@@ -1,109 +1,137 @@
-from typing import List, Dict
-import re
-import numpy as np
+import asyncio
+import time
+from typing import Awaitable, List
+
+from app.vectorstore.store import (
+    get_chunk_count,
+    get_chunks,
+    get_lexical_index,
+    search_vectors,
+)
+from app.vectorstore.lexical_index import simple_tokenize
+from app.llm.embeddings import embed_query, embed_query_async
+from app.retrieval.candidate import EMPTY_HITS, Candidate, Hits, fuse
+from app.retrieval.pool import executor, run_in_pool
+
+
+# --------------------------------------------------
+# Phase 1: ids and scores only
+# --------------------------------------------------
+def bm25_search_many(
+    queries: List[str],
+    conversation_id: int,
+    k: int = 5,
+) -> List[Hits]:
+    """
+    Chunk ids and BM25 scores for each query, best first, all scored
+    against the conversation's one lexical index. Higher is better.
+    """
+    index = get_lexical_index(conversation_id)
+    if not len(index):
+        return [EMPTY_HITS for _ in queries]
+
+    out = []
+    for query in queries:
+        topk, scores = index.top_k(simple_tokenize(query), k)
+        out.append(([index.ids[i] for i in topk], scores))
+    return out
 
-from rank_bm25 import BM25Okapi
 
-from app.vectorstore.store import get_collection
-from app.llm.embeddings import embed
+def bm25_search(
+    query: str,
+    conversation_id: int,
+    k: int = 5,
+) -> Hits:
+    return bm25_search_many([query], conversation_id, k=k)[0]
+
+
+def dense_search_many(
+    query_vecs: List[list[float]],
+    conversation_id: int,
+    k: int = 5,
+) -> List[Hits]:
+    """
+    Chunk ids and distances for each already-embedded query, from one
+    multi-vector search (in-process for small conversations, Chroma
+    otherwise), best first. Lower is better. Documents and metadata are
+    not fetched.
+    """
+    return search_vectors(query_vecs, conversation_id, k=k)
 
 
-def simple_tokenize(text: str) -> List[str]:
-    return re.findall(r"\w+", (text or "").lower())
+def dense_search(
+    query_vec: list[float],
+    conversation_id: int,
+    k: int = 5,
+) -> Hits:
+    return dense_search_many([query_vec], conversation_id, k=k)[0]
 
 
-def build_bm25_index(conversation_id: int):
+# --------------------------------------------------
+# Phase 2: hydrate the survivors
+# --------------------------------------------------
+def hydrate(candidates: List[Candidate]) -> List[Candidate]:
     """
-    NOTE:
-    BM25 index is rebuilt per query.
-    This is intentionally left uncached for correctness.
+    Fill in text and metadata, keeping order. Candidates whose chunk is
+    gone, or whose text repeats an earlier one, are dropped.
     """
-    collection = get_collection()
+    chunks = get_chunks([c.id for c in candidates])
 
-    data = collection.get(
-        where={"conversation_id": conversation_id},
-        include=["documents", "metadatas"],
-    )
+    out = []
+    seen = set()
+    for c in candidates:
+        chunk = chunks.get(c.id)
+        if chunk is None or chunk[0] in seen:
+            continue
+        seen.add(chunk[0])
+        c.text, c.meta = chunk
+        out.append(c)
 
-    docs = data.get("documents", [])
-    metas = data.get("metadatas", [])
+    return out
 
-    if not docs:
-        return None, [], []
 
-    tokenized = [simple_tokenize(d) for d in docs]
-    return BM25Okapi(tokenized), docs, metas
+def _as_candidates(hits: Hits) -> List[Candidate]:
+    ids, scores = hits
+    return [Candidate(i, float(s)) for i, s in zip(ids, scores)]
 
 
 def bm25_retrieve(
     query: str,
     conversation_id: int,
     k: int = 5,
-) -> List[Dict]:
-    bm25, docs, metas = build_bm25_index(conversation_id)
-    if bm25 is None:
-        return []
-
-    tokens = simple_tokenize(query)
-    scores = bm25.get_scores(tokens)
-
-    topk = np.argsort(scores)[::-1][:k]
-
-    out = []
-    for i in topk:
-        meta = metas[i] or {}
-        out.append(
-            {
-                "text": docs[i],
-                "source": meta.get("source", "unknown"),
-                "score": float(scores[i]),  # higher is better
-                "meta": meta,
-            }
-        )
-
-    return out
+) -> List[Candidate]:
+    return hydrate(_as_candidates(bm25_search(query, conversation_id, k=k)))
 
 
 def dense_retrieve_raw(
     query: str,
     conversation_id: int,
     k: int = 5,
-) -> List[Dict]:
-    collection = get_collection()
-
-    existing = collection.get(
-        where={"conversation_id": conversation_id},
-        include=["documents", "metadatas"],
-    )
-    if not existing.get("documents"):
+) -> List[Candidate]:
+    if not get_chunk_count(conversation_id):
         return []
 
-    query_vec = embed([query])[0]
+    hits = dense_search(embed_query(query), conversation_id, k=k)
+    return hydrate(_as_candidates(hits))
 
-    res = collection.query(
-        query_embeddings=[query_vec],
-        n_results=k,
-        where={"conversation_id": conversation_id},
-        include=["documents", "metadatas", "distances"],
-    )
 
-    out = []
-    for text, meta, dist in zip(
-        res["documents"][0],
-        res["metadatas"][0],
-        res["distances"][0],
-    ):
-        meta = meta or {}
-        out.append(
-            {
-                "text": text,
-                "source": meta.get("source", "unknown"),
-                "score": float(dist),  # lower is better
-                "meta": meta,
-            }
-        )
+# --------------------------------------------------
+# Stage timings
+# --------------------------------------------------
+def _timed(timings: dict, stage: str, fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = round((time.perf_counter() - t0) * 1000, 2)
 
-    return out
+
+async def _timed_async(timings: dict, stage: str, awaitable):
+    t0 = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = round((time.perf_counter() - t0) * 1000, 2)
 
 
 def hybrid_retrieve(
@@ -111,64 +139,90 @@ def hybrid_retrieve(
     conversation_id: int,
     k: int = 10,
     alpha: float = 0.5,
-) -> List[Dict]:
+    fusion: str = "weighted",
+    trace: dict | None = None,
+) -> List[Candidate]:
     """
     Final evaluated retrieval strategy.
     Combines:
       - BM25 (lexical)
       - Dense embeddings
+    Fusion works on ids and scores; only the final k are hydrated.
+
+    The query embedding (network-bound) and dense search start first on
+    the retrieval pool while BM25 scores on this thread. If `trace` is
+    given, trace["timings"] gets per-stage milliseconds.
     """
+    timings: dict = {}
+    t0 = time.perf_counter()
 
-    bm25_docs = bm25_retrieve(query, conversation_id, k=k * 2)
-    dense_docs = dense_retrieve_raw(query, conversation_id, k=k * 2)
+    def dense_stage():
+        if not get_chunk_count(conversation_id):
+            return EMPTY_HITS
+        query_vec = _timed(timings, "embed", embed_query, query)
+        return _timed(timings, "dense", dense_search, query_vec, conversation_id, k=k * 2)
 
-    if not bm25_docs and not dense_docs:
-        return []
+    dense_future = executor.submit(dense_stage)
+    bm25_hits = _timed(timings, "bm25", bm25_search, query, conversation_id, k=k * 2)
+    dense_hits = dense_future.result()
+
+    fused = _timed(timings, "fuse", fuse, bm25_hits, dense_hits, k=k, alpha=alpha, method=fusion)
+    docs = _timed(timings, "hydrate", hydrate, fused)
 
-    bm25_scores = [d["score"] for d in bm25_docs] or [0.0]
-    bm25_max = max(bm25_scores) or 1.0
-
-    dense_dists = [d["score"] for d in dense_docs] or [1.0]
-    dense_max = max(dense_dists) or 1.0
-
-    merged: dict[str, dict] = {}
-
-    def key(d):
-        return d["text"]
-
-    for d in bm25_docs:
-        merged[key(d)] = {
-            "text": d["text"],
-            "source": d["source"],
-            "meta": d["meta"],
-            "hybrid_score": (1 - alpha) * (d["score"] / bm25_max),
-        }
-
-    for d in dense_docs:
-        dense_sim = 1.0 - (d["score"] / dense_max)
-
-        if key(d) not in merged:
-            merged[key(d)] = {
-                "text": d["text"],
-                "source": d["source"],
-                "meta": d["meta"],
-                "hybrid_score": alpha * dense_sim,
-            }
-        else:
-            merged[key(d)]["hybrid_score"] += alpha * dense_sim
-
-    ranked = sorted(
-        merged.values(),
-        key=lambda x: x["hybrid_score"],
-        reverse=True,
+    timings["total"] = round((time.perf_counter() - t0) * 1000, 2)
+    if trace is not None:
+        trace["timings"] = timings
+    return docs
+
+
+async def hybrid_retrieve_async(
+    query: str,
+    conversation_id: int,
+    k: int = 10,
+    alpha: float = 0.5,
+    fusion: str = "weighted",
+    trace: dict | None = None,
+    query_vec: Awaitable[list[float]] | None = None,
+) -> List[Candidate]:
+    """
+    hybrid_retrieve() for the event loop.
+    Embedding uses the async client; Chroma and BM25 run in the worker pool.
+    The embed -> dense chain and BM25 run concurrently.
+
+    Callers that started the query embedding earlier (e.g. as a task at
+    the top of the request) pass it as `query_vec`; "embed" then times
+    only the remaining wait.
+    """
+    timings: dict = {}
+    t0 = time.perf_counter()
+    embedding = query_vec if query_vec is not None else embed_query_async(query)
+
+    async def dense_stage():
+        if not await run_in_pool(get_chunk_count, conversation_id):
+            # Nothing to search: don't leave the embedding call running
+            if asyncio.isfuture(embedding):
+                embedding.cancel()
+            elif asyncio.iscoroutine(embedding):
+                embedding.close()
+            return EMPTY_HITS
+        query_vec = await _timed_async(timings, "embed", embedding)
+        return await _timed_async(
+            timings, "dense",
+            run_in_pool(dense_search, query_vec, conversation_id, k=k * 2),
+        )
+
+    bm25_hits, dense_hits = await asyncio.gather(
+        _timed_async(
+            timings, "bm25",
+            run_in_pool(bm25_search, query, conversation_id, k=k * 2),
+        ),
+        dense_stage(),
     )
 
-    return [
-        {
-            "text": r["text"],
-            "source": r["source"],
-            "score": float(r["hybrid_score"]),
-            "meta": r["meta"],
-        }
-        for r in ranked[:k]
-    ]
+    fused = _timed(timings, "fuse", fuse, bm25_hits, dense_hits, k=k, alpha=alpha, method=fusion)
+    docs = await _timed_async(timings, "hydrate", run_in_pool(hydrate, fused))
+
+    timings["total"] = round((time.perf_counter() - t0) * 1000, 2)
+    if trace is not None:
+        trace["timings"] = timings
+    return docs
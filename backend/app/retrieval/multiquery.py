@@ -1,5 +1,45 @@
-from app.retrieval.hybrid import hybrid_retrieve
+import logging
+from typing import Callable, List
+
+from app.llm.embeddings import embed_queries
 from app.llm.utils import generate_query_variations
+from app.retrieval.candidate import EMPTY_HITS, Candidate, Hits, fuse
+from app.retrieval.hybrid import (
+    bm25_search_many,
+    dense_search_many,
+    hydrate,
+)
+from app.retrieval.pool import executor
+from app.vectorstore.store import get_chunk_count
+
+
+def _per_query_fallback(
+    search_many: Callable[..., List[Hits]],
+    queries: List[str],
+    *args,
+    **kwargs,
+) -> List[Hits]:
+    """
+    search_many() over all queries at once. If the batch fails, each
+    query is retried on its own and the ones that still fail get no hits,
+    so one bad rewrite never fails the whole request.
+    """
+    try:
+        return search_many(queries, *args, **kwargs)
+    except Exception as e:
+        logging.warning(f"[multiquery] batched {search_many.__name__} failed: {e}")
+
+    out = []
+    for q in queries:
+        try:
+            out.append(search_many([q], *args, **kwargs)[0])
+        except Exception:
+            out.append(EMPTY_HITS)
+    return out
+
+
+def _embed_and_search_many(queries: List[str], conversation_id: int, k: int) -> List[Hits]:
+    return dense_search_many(embed_queries(queries), conversation_id, k=k)
 
 
 def multiquery_search(
@@ -7,33 +47,39 @@ def multiquery_search(
     conversation_id: int,
     k: int = 10,
     num_queries: int = 3,
-):
+) -> List[Candidate]:
+    """
+    Hybrid retrieval for the query plus its LLM rewrites, batched:
+    one embedding call for all queries, one multi-vector Chroma query,
+    BM25 for all queries against the shared lexical index (overlapped
+    with the embedding), then per-query fusion and a single hydration.
+    A query whose retrieval fails contributes nothing instead of failing
+    the request.
+    """
     variations = generate_query_variations(query, n=num_queries)
 
     # ✅ If variations fail, fall back to original query only
     all_queries = [query] + variations if variations else [query]
 
-    results = []
+    def dense_stage():
+        if not get_chunk_count(conversation_id):
+            return [EMPTY_HITS for _ in all_queries]
+        return _per_query_fallback(
+            _embed_and_search_many, all_queries, conversation_id, k=k * 2
+        )
 
-    for q in all_queries:
-        try:
-            docs = hybrid_retrieve(
-                q,
-                conversation_id=conversation_id,
-                k=k,
-                alpha=0.5,
-            )
-            results.extend(docs)
-        except Exception:
-            continue
+    dense_future = executor.submit(dense_stage)
+    bm25_hits = _per_query_fallback(bm25_search_many, all_queries, conversation_id, k=k * 2)
+    dense_hits = dense_future.result()
 
-    # Deduplicate by exact text
+    # Per-query top-k, in query order; deduplicate by chunk id
     seen = set()
     unique = []
-    for d in results:
-        t = d.get("text", "")
-        if t and t not in seen:
-            seen.add(t)
-            unique.append(d)
+    for bm25, dense in zip(bm25_hits, dense_hits):
+        for c in fuse(bm25, dense, k=k, alpha=0.5):
+            if c.id not in seen:
+                seen.add(c.id)
+                unique.append(c)
 
-    return unique[: k * 4]
+    # Hydration also drops repeated text
+    return hydrate(unique[: k * 4])
@@ -0,0 +1,17 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.config import settings
+
+# Chroma calls and BM25 scoring are blocking; keep them off the event loop.
+# NumPy/SciPy and Chroma's native code release the GIL for the heavy parts.
+executor = ThreadPoolExecutor(
+    max_workers=settings.RETRIEVAL_WORKERS,
+    thread_name_prefix="retrieval",
+)
+
+
+async def run_in_pool(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
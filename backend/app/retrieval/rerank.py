@@ -1,99 +1,178 @@
-from sentence_transformers import CrossEncoder
+import hashlib
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.llm.embeddings import embed_query, normalize_query
+from app.resources import reranker, rerank_score_cache
+from app.retrieval.candidate import Candidate
+from app.vectorstore.store import get_chunk_embeddings
+
+
+def _score_key(query: str, text: str) -> str:
+    # Backend is part of the model identity: int8 scores differ slightly
+    chunk_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    raw = f"{settings.RERANK_MODEL}\0{settings.RERANK_BACKEND}\0{query}\0{chunk_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def score_pairs(query: str, texts: List[str], use_cache: bool = True) -> np.ndarray:
+    """
+    Cross-encoder scores for (query, text) pairs, served from the score
+    cache where possible; each distinct uncached text is scored once.
+    """
+    query = normalize_query(query)
+    keys = [_score_key(query, t) for t in texts]
+    cached = rerank_score_cache().get_many(keys) if use_cache else {}
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    if missing:
+        fresh = reranker().predict([(query, t) for t in missing.values()])
+        encoded = {
+            key: np.float32(s).tobytes() for key, s in zip(missing.keys(), fresh)
+        }
+        if use_cache:
+            rerank_score_cache().put_many(encoded)
+        cached.update(encoded)
+
+    return np.array(
+        [np.frombuffer(cached[key], dtype=np.float32)[0] for key in keys],
+        dtype=np.float32,
+    )
+
+
+def _select_diverse(
+    candidates: List[Candidate],
+    scores: np.ndarray,
+    top_k: int,
+    max_per_source: int,
+) -> List[Candidate]:
+    # ----------------------------
+    # Sort by relevance
+    # ----------------------------
+    order = np.argsort(-scores, kind="stable")
 
-model = CrossEncoder("mixedbread-ai/mxbai-rerank-xsmall-v1")
+    # ----------------------------
+    # SOURCE-DIVERSE SELECTION
+    # ----------------------------
+    final_docs = []
+    source_counts = {}
+
+    for i in order:
+        c = candidates[i]
+        src = c.source
+        count = source_counts.get(src, 0)
+
+        if count >= max_per_source:
+            continue
+
+        final_docs.append(Candidate(c.id, float(scores[i]), c.text, c.meta))
+        source_counts[src] = count + 1
+
+        if len(final_docs) >= top_k:
+            break
+
+    return final_docs
 
 
 def rerank(
     query: str,
-    docs: list,
+    docs: List[Candidate],
     top_k: int = 5,
     max_per_source: int = 2,
-):
+    use_cache: bool = True,
+) -> List[Candidate]:
     if not docs:
         print("🟡 RERANK: received empty docs")
         return []
 
-    # print("\n🔵 RERANK INPUT (raw docs):")
-    # for i, d in enumerate(docs[:5]):
-    #     print(f"  [{i}] type={type(d)} value={d}")
-
-    # ----------------------------
-    # Normalize (BUT PRESERVE META)
-    # ----------------------------
-    normalized = []
-
-    for d in docs:
-        if not isinstance(d, dict):
-            continue
-
-        text = d.get("text")
-        if not text:
-            continue
-
-        source = d.get("source") or "unknown"
-        meta = d.get("meta") or {}
-
-        # ✅ keep everything important
-        normalized.append(
-            {
-                "text": text,
-                "source": source,
-                "meta": meta,  # ✅ REQUIRED for structured tables
-            }
-        )
-
-    # print("\n🟢 RERANK AFTER NORMALIZATION:")
-    # for i, d in enumerate(normalized[:5]):
-    #     print(f"  [{i}] text_len={len(d['text'])} source={d['source']} meta_keys={list((d.get('meta') or {}).keys())}")
-
-    if not normalized:
+    # Meta (structured tables) rides along on each candidate
+    candidates = [d for d in docs if d.text]
+    if not candidates:
         return []
 
     # ----------------------------
     # Cross-encoder scoring
     # ----------------------------
-    pairs = [(query, d["text"]) for d in normalized]
-    scores = model.predict(pairs)
-
-    scored_docs = []
-    for d, score in zip(normalized, scores):
-        scored_docs.append(
-            {
-                "text": d["text"],
-                "source": d["source"],
-                "score": float(score),
-                "meta": d.get("meta") or {},  # ✅ keep meta even after scoring
-            }
-        )
+    scores = score_pairs(query, [c.text for c in candidates], use_cache=use_cache)
+    return _select_diverse(candidates, scores, top_k, max_per_source)
 
-    # ----------------------------
-    # Sort by relevance
-    # ----------------------------
-    scored_docs.sort(key=lambda x: x["score"], reverse=True)
 
-    # ----------------------------
-    # SOURCE-DIVERSE SELECTION
-    # ----------------------------
-    final_docs = []
-    source_counts = {}
+# --------------------------------------------------
+# Cascade: cheap scorer first, cross-encoder on the uncertain head
+# --------------------------------------------------
+def _minmax(x: np.ndarray) -> np.ndarray:
+    span = float(x.max() - x.min()) if len(x) else 0.0
+    return (x - x.min()) / span if span > 0 else np.ones_like(x)
 
-    for d in scored_docs:
-        src = d["source"]
-        count = source_counts.get(src, 0)
 
-        if count >= max_per_source:
-            continue
+def cheap_scores(query: str, candidates: List[Candidate], weight: float = 0.5) -> np.ndarray:
+    """
+    weight * min-max fused retrieval score + (1 - weight) * cosine between
+    the query embedding (cached) and the stored chunk embeddings.
+    """
+    fused = _minmax(np.array([c.score for c in candidates], dtype=np.float64))
 
-        final_docs.append(d)
-        source_counts[src] = count + 1
+    vectors = get_chunk_embeddings([c.id for c in candidates])
+    if len(vectors) < len(candidates):
+        return fused
 
-        if len(final_docs) >= top_k:
-            break
+    q = np.asarray(embed_query(query), dtype=np.float64)
+    m = np.array([vectors[c.id] for c in candidates], dtype=np.float64)
+    cosine = (m @ q) / (np.linalg.norm(m, axis=1) * np.linalg.norm(q) + 1e-12)
 
-    # print("\n🟣 RERANK OUTPUT (source-diverse):")
-    # for i, d in enumerate(final_docs):
-    #     print(
-    #         f"  [{i}] score={d['score']:.4f} source={d['source']} meta_type={(d.get('meta') or {}).get('type')}"
-    #     )
+    return weight * fused + (1 - weight) * cosine
 
-    return final_docs
+
+def rerank_cascade(
+    query: str,
+    docs: List[Candidate],
+    top_k: int = 5,
+    max_per_source: int = 2,
+    head: int | None = None,
+    margin: float | None = None,
+    use_cache: bool = True,
+    trace: dict | None = None,
+) -> List[Candidate]:
+    """
+    rerank() with a cheap first stage:
+      1. score every candidate with cheap_scores()
+      2. take the source-diverse cheap top_k (max_per_source applied);
+         if a next candidate the cap would still admit exists and the
+         last member leads it by at least `margin`, return it without
+         running the cross-encoder (early exit; never with margin=inf)
+      3. otherwise cross-encode only the cheap top `head`
+    On early exit the returned scores are cheap scores (roughly [-0.5, 1]),
+    not cross-encoder logits, so they must not be compared with rerank()
+    output or thresholded the same way. If `trace` is given it gets
+    pairs_scored / early_exit / score_kind ("cheap" or "cross_encoder").
+    """
+    head = head or settings.RERANK_CASCADE_HEAD
+    margin = settings.RERANK_CASCADE_MARGIN if margin is None else margin
+
+    candidates = [d for d in docs if d.text]
+    if len(candidates) <= top_k:
+        if trace is not None:
+            trace.update(pairs_scored=len(candidates), early_exit=False, score_kind="cross_encoder")
+        return rerank(query, candidates, top_k, max_per_source, use_cache)
+
+    cheap = cheap_scores(query, candidates)
+
+    # One pick past top_k: the best candidate the source cap still admits.
+    # Without one there is no lead to measure, so the cross-encoder decides.
+    picks = _select_diverse(candidates, cheap, top_k + 1, max_per_source)
+    if len(picks) > top_k and picks[top_k - 1].score - picks[top_k].score >= margin:
+        if trace is not None:
+            trace.update(pairs_scored=0, early_exit=True, score_kind="cheap")
+        return picks[:top_k]
+
+    order = np.argsort(-cheap, kind="stable")
+    shortlist = [candidates[i] for i in order[:head]]
+    if trace is not None:
+        trace.update(pairs_scored=len(shortlist), early_exit=False, score_kind="cross_encoder")
+    return rerank(query, shortlist, top_k, max_per_source, use_cache)
@@ -0,0 +1,167 @@
+"""
+Cross-encoder scoring backends for `rerank`.
+
+Every backend exposes `predict(pairs) -> np.ndarray` of relevance scores
+(sigmoid of the model's single logit, as `CrossEncoder.predict` returns
+for this model), so they are interchangeable:
+
+- TorchCrossEncoder: sentence-transformers / PyTorch, full precision.
+- OnnxCrossEncoder:  the same model exported to ONNX Runtime with
+  dynamic int8 quantization (see `export_onnx`). Needs only
+  onnxruntime + tokenizers at serving time.
+
+Both sort pairs by length before batching so each forward pass pads to
+similar lengths.
+
+Export the ONNX model once (needs `optimum[onnxruntime]`):
+    python -m app.retrieval.rerank_backends --out ./models/mxbai-rerank-xsmall-v1-onnx-int8
+"""
+
+import argparse
+import json
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+Pair = Tuple[str, str]
+
+
+def _length_batches(lengths: np.ndarray, batch_size: int) -> List[np.ndarray]:
+    """
+    Indices grouped into batches of similar length (shortest first).
+    """
+    order = np.argsort(lengths, kind="stable")
+    return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class TorchCrossEncoder:
+    def __init__(self, model_name: str, batch_size: int = 32, max_length: int = 512):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, max_length=max_length)
+        self.batch_size = batch_size
+
+    def predict(self, pairs: List[Pair]) -> np.ndarray:
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+
+        # Character length is a good enough proxy for token length here
+        lengths = np.fromiter((len(q) + len(t) for q, t in pairs), dtype=np.int64, count=len(pairs))
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for idx in _length_batches(lengths, self.batch_size):
+            scores[idx] = self.model.predict(
+                [pairs[i] for i in idx],
+                batch_size=len(idx),
+                show_progress_bar=False,
+            )
+        return scores
+
+
+class OnnxCrossEncoder:
+    def __init__(self, model_dir: str, batch_size: int = 32, max_length: int = 512):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        quantized = os.path.join(model_dir, "model_quantized.onnx")
+        path = quantized if os.path.exists(quantized) else os.path.join(model_dir, "model.onnx")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.pad_id = self._pad_id(model_dir)
+        self.batch_size = batch_size
+
+    def _pad_id(self, model_dir: str) -> int:
+        config_path = os.path.join(model_dir, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                pad = json.load(f).get("pad_token_id")
+            if pad is not None:
+                return int(pad)
+        return self.tokenizer.token_to_id("[PAD]") or 0
+
+    def _forward(self, encodings) -> np.ndarray:
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.full((len(encodings), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encodings), width), dtype=np.int64)
+        token_type_ids = np.zeros((len(encodings), width), dtype=np.int64)
+
+        for row, e in enumerate(encodings):
+            n = len(e.ids)
+            input_ids[row, :n] = e.ids
+            attention_mask[row, :n] = 1
+            token_type_ids[row, :n] = e.type_ids
+
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": token_type_ids,
+        }
+        feeds = {k: v for k, v in feeds.items() if k in self.input_names}
+        logits = self.session.run(None, feeds)[0]
+        return _sigmoid(logits.reshape(len(encodings), -1)[:, 0])
+
+    def predict(self, pairs: List[Pair]) -> np.ndarray:
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(pairs))
+        lengths = np.fromiter((len(e.ids) for e in encodings), dtype=np.int64, count=len(encodings))
+
+        scores = np.empty(len(pairs), dtype=np.float32)
+        for idx in _length_batches(lengths, self.batch_size):
+            scores[idx] = self._forward([encodings[i] for i in idx])
+        return scores
+
+
+# --------------------------------------------------
+# Export (offline, one-time)
+# --------------------------------------------------
+def export_onnx(model_name: str, out_dir: str, quantize: bool = True):
+    """
+    Export the Hugging Face cross-encoder to ONNX and write a dynamic
+    int8-quantized copy (model_quantized.onnx) next to it.
+    """
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+    if quantize:
+        quantizer = ORTQuantizer.from_pretrained(model)
+        quantizer.quantize(
+            save_dir=out_dir,
+            quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=True),
+        )
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.RERANK_MODEL)
+    parser.add_argument("--out", default=settings.RERANK_ONNX_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    export_onnx(args.model, args.out, quantize=not args.no_quantize)
+    print(f"ONNX reranker written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces `predict` calls from concurrent requests into one backend
+    call. The first request waits at most `max_wait_ms` for others to
+    join, and a forward call never takes more than `max_batch_pairs`
+    (one request's pairs are never split). Callers block on their own
+    slice of the scores, so the interface matches the backend's.
+    """
+
+    def __init__(self, backend, max_batch_pairs: int = 256, max_wait_ms: float = 5.0):
+        self.backend = backend
+        self.max_batch_pairs = max_batch_pairs
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: queue.Queue = queue.Queue()
+        # Request that did not fit the previous batch; it opens the next one
+        self._held = None
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.requests = 0
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="rerank-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+
+        self._start()
+        future: Future = Future()
+        self._queue.put((list(pairs), future))
+        return future.result()
+
+    def _collect(self):
+        first, self._held = self._held or self._queue.get(), None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch_pairs:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(item[0]) > self.max_batch_pairs:
+                self._held = item
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            pairs = [p for item_pairs, _ in batch for p in item_pairs]
+
+            try:
+                scores = self.backend.predict(pairs)
+            except Exception as e:
+                logging.exception("[rerank] batched predict failed")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+
+            offset = 0
+            for item_pairs, future in batch:
+                future.set_result(scores[offset : offset + len(item_pairs)])
+                offset += len(item_pairs)
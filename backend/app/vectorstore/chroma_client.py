@@ -1,5 +0,0 @@
-import chromadb
-from app.config import settings
-
-
-client=chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
\ No newline at end of file
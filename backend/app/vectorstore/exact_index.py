@@ -0,0 +1,344 @@
+import glob
+import os
+import threading
+from typing import List, Tuple
+
+import numpy as np
+
+QUANTIZATIONS = ("none", "float16", "int8")
+
+# Rows converted to float32 at a time when scanning quantized codes
+# (small enough for the buffer to stay in cache)
+_SCAN_BLOCK = 256
+# Rows read at a time when deriving norms/codes from the float32 file
+_LOAD_BLOCK = 8192
+
+
+def quantize(vectors: np.ndarray, mode: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Codes (and per-vector scales for int8) for float32 vectors.
+    int8 is symmetric per vector: x ~= scale * code, scale = max|x| / 127.
+    """
+    if mode == "float16":
+        return vectors.astype(np.float16), None
+    if mode == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown quantization: {mode}")
+
+
+class ExactIndex:
+    """
+    Brute-force nearest-neighbour search over one conversation's vectors.
+
+    Vectors are one contiguous float32 matrix, memory-mapped from its .npy
+    snapshot, so only conversations that are actually queried become
+    resident. A batch of queries is a single BLAS matmul followed by an
+    argpartition per query. Distances are squared L2, which is what
+    Chroma's default "l2" space returns, so results are interchangeable
+    with a Chroma query over the same vectors.
+
+    Two-stage mode: the first pass scans a compact copy held in memory
+    instead, and only the best `rescore_factor * k` rows per query are
+    read back from the float32 file and rescored exactly, so the float32
+    matrix never has to be resident. The compact copy is
+      - quantization="float16" / "int8": quantized codes, and/or
+      - prefix_dims=N: the first N dims, re-normalised (Matryoshka
+        embeddings such as text-embedding-3-* are trained so that this
+        prefix is itself a usable embedding; it equals what the API's
+        `dimensions` parameter returns).
+
+    float16 only saves memory: numpy has no fast float16 -> float32
+    conversion, so its first pass is several times slower than scanning
+    float32 (about 7x in bench_vector_quantization). int8 is 4x smaller
+    and close to float32 speed; prefer it whenever latency matters.
+    """
+
+    def __init__(
+        self,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        prefix_dims: int = 0,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.prefix_dims = prefix_dims
+
+        self.ids: list[str] = []
+        self.positions: dict[str, int] = {}
+
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.sq_norms = np.zeros(0, dtype=np.float32)
+        self.codes: np.ndarray | None = None
+        self.scales: np.ndarray | None = None
+
+        # Rows added since the last consolidation (ingestion appends in
+        # batches; concatenating once per query/save avoids quadratic copies)
+        self._pending: list[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def quantized(self) -> bool:
+        return self.quantization != "none"
+
+    @property
+    def two_stage(self) -> bool:
+        return self.quantized or self.prefix_dims > 0
+
+    @property
+    def _codes_tag(self) -> str:
+        parts = [f"p{self.prefix_dims}"] if self.prefix_dims else []
+        if self.quantized:
+            parts.append(self.quantization)
+        return "-".join(parts)
+
+    def resident_bytes(self) -> int:
+        """
+        Bytes the first-pass scan needs in memory (norms included).
+        """
+        if not self.two_stage:
+            return self.vectors.nbytes + self.sq_norms.nbytes
+        total = self.sq_norms.nbytes + (self.codes.nbytes if self.codes is not None else 0)
+        return total + (self.scales.nbytes if self.scales is not None else 0)
+
+    # --------------------------------------------------
+    # Updates
+    # --------------------------------------------------
+    def add(self, ids: list[str], embeddings: list[list[float]]):
+        with self._lock:
+            rows = []
+            for i, chunk_id in enumerate(ids):
+                # Chroma ignores re-added ids; mirror that here
+                if chunk_id in self.positions:
+                    continue
+                self.positions[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+                rows.append(i)
+
+            if rows:
+                self._pending.append(
+                    np.asarray(embeddings, dtype=np.float32)[rows]
+                )
+
+    def _consolidate(self):
+        if not self._pending:
+            return
+
+        new = np.concatenate(self._pending)
+        self._pending = []
+
+        self.vectors = np.concatenate([self.vectors, new]) if len(self.vectors) else new
+
+        codes, scales, sq_norms = self._first_pass(new)
+        self.sq_norms = np.concatenate([self.sq_norms, sq_norms])
+        if codes is not None:
+            self._append_codes(codes, scales)
+
+    def _reduce(self, vectors: np.ndarray) -> np.ndarray:
+        if not self.prefix_dims or self.prefix_dims >= vectors.shape[1]:
+            return vectors
+        prefix = vectors[:, : self.prefix_dims]
+        norms = np.linalg.norm(prefix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return prefix / norms
+
+    def _first_pass(self, vectors: np.ndarray):
+        """
+        (codes, scales, squared norms) of the first-pass representation;
+        codes is None when the first pass scans the float32 vectors.
+        """
+        reduced = self._reduce(vectors)
+        sq_norms = np.einsum("ij,ij->i", reduced, reduced)
+        if self.quantized:
+            return (*quantize(reduced, self.quantization), sq_norms)
+        if self.prefix_dims:
+            return np.ascontiguousarray(reduced, dtype=np.float32), None, sq_norms
+        return None, None, sq_norms
+
+    def _append_codes(self, codes: np.ndarray, scales: np.ndarray | None):
+        if self.codes is None or not len(self.codes):
+            self.codes, self.scales = codes, scales
+            return
+        self.codes = np.concatenate([self.codes, codes])
+        if scales is not None:
+            self.scales = np.concatenate([self.scales, scales])
+
+    # --------------------------------------------------
+    # Search
+    # --------------------------------------------------
+    @staticmethod
+    def _approx_dots(q: np.ndarray, codes: np.ndarray, scales: np.ndarray | None) -> np.ndarray:
+        """
+        (queries, rows) inner products against the dequantized codes,
+        converting a block of rows at a time.
+        """
+        if codes.dtype == np.float32:
+            return q @ codes.T
+
+        dots = np.empty((len(q), len(codes)), dtype=np.float32)
+        buf = np.empty((_SCAN_BLOCK, codes.shape[1]), dtype=np.float32)
+        for s in range(0, len(codes), _SCAN_BLOCK):
+            block = buf[: len(codes[s : s + _SCAN_BLOCK])]
+            block[...] = codes[s : s + _SCAN_BLOCK]
+            dots[:, s : s + len(block)] = q @ block.T
+        if scales is not None:
+            dots *= scales
+        return dots
+
+    @staticmethod
+    def _best(row: np.ndarray, k: int) -> np.ndarray:
+        if k >= len(row):
+            return np.argsort(row, kind="stable")
+        top = np.argpartition(row, k - 1)[:k]
+        return top[np.argsort(row[top], kind="stable")]
+
+    def search_many(
+        self,
+        query_vecs: List[list[float]],
+        k: int,
+    ) -> List[Tuple[List[str], np.ndarray]]:
+        """
+        Chunk ids and squared-L2 distances for each query, best first.
+        """
+        with self._lock:
+            self._consolidate()
+            vectors, sq_norms, ids = self.vectors, self.sq_norms, self.ids
+            codes, scales = self.codes, self.scales
+
+        n = len(sq_norms)
+        if not n or not len(query_vecs):
+            return [([], np.zeros(0)) for _ in query_vecs]
+
+        q = np.asarray(query_vecs, dtype=np.float32)
+        q_first = self._reduce(q)
+        q_norms = np.einsum("ij,ij->i", q_first, q_first)
+        k = min(k, n)
+
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2, for every (query, row) at once
+        if self.two_stage:
+            dists = self._approx_dots(q_first, codes, scales)
+        else:
+            dists = q @ vectors.T
+        dists *= -2
+        dists += sq_norms
+        dists += q_norms[:, None]
+        np.maximum(dists, 0, out=dists)
+
+        results = []
+        for qi, row in enumerate(dists):
+            if not self.two_stage:
+                top = self._best(row, k)
+                results.append(([ids[i] for i in top], row[top].astype(np.float64)))
+                continue
+
+            # Rescore the shortlist against the float32 rows (sorted
+            # positions keep the memory-mapped reads sequential)
+            shortlist = np.sort(self._best(row, min(n, k * self.rescore_factor)))
+            full = np.asarray(vectors[shortlist], dtype=np.float32)
+            diff = full - q[qi]
+            exact = np.einsum("ij,ij->i", diff, diff)
+            top = self._best(exact, k)
+            results.append(
+                ([ids[shortlist[i]] for i in top], exact[top].astype(np.float64))
+            )
+        return results
+
+    # --------------------------------------------------
+    # Snapshot
+    # --------------------------------------------------
+    def save(self, path: str):
+        """
+        Write <path>.npy (vectors), <path>.ids.npy and, in two-stage mode,
+        <path>.<tag>.npz (codes, scales, norms; tag e.g. "int8", "p256"). The vectors file
+        is replaced first; load() rejects files whose lengths disagree.
+        Afterwards the vectors are memory-mapped from the new file.
+        """
+        with self._lock:
+            self._consolidate()
+            vectors = self.vectors
+            ids = np.asarray(self.ids, dtype=str)
+            codes, scales, sq_norms = self.codes, self.scales, self.sq_norms
+
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        np.save(path + suffix + ".npy", vectors)
+        np.save(path + ".ids" + suffix + ".npy", ids)
+        os.replace(path + suffix + ".npy", path + ".npy")
+        os.replace(path + ".ids" + suffix + ".npy", path + ".ids.npy")
+
+        if self.two_stage and codes is not None:
+            arrays = {"codes": codes, "sq_norms": sq_norms}
+            if scales is not None:
+                arrays["scales"] = scales
+            tmp = f"{path}.{self._codes_tag}{suffix}.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, f"{path}.{self._codes_tag}.npz")
+
+        if len(ids):
+            with self._lock:
+                if not self._pending and len(self.ids) == len(ids):
+                    self.vectors = np.load(path + ".npy", mmap_mode="r")
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(path + ".npy") and os.path.exists(path + ".ids.npy")
+
+    @staticmethod
+    def remove(path: str):
+        names = [path + ".npy", path + ".ids.npy"]
+        names += glob.glob(glob.escape(path) + ".*.npz")
+        for name in names:
+            if os.path.exists(name):
+                os.remove(name)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        prefix_dims: int = 0,
+    ) -> "ExactIndex | None":
+        ids = np.load(path + ".ids.npy", allow_pickle=False).tolist()
+        vectors = np.load(path + ".npy", mmap_mode="r")
+        if len(vectors) != len(ids):
+            return None
+
+        index = cls(quantization, rescore_factor, prefix_dims)
+        index.ids = ids
+        index.positions = {chunk_id: i for i, chunk_id in enumerate(ids)}
+        if not ids:
+            return index
+        index.vectors = vectors
+
+        codes_path = f"{path}.{index._codes_tag}.npz"
+        if index.two_stage and os.path.exists(codes_path):
+            with np.load(codes_path, allow_pickle=False) as f:
+                if len(f["codes"]) == len(ids):
+                    index.codes = f["codes"]
+                    index.scales = f["scales"] if "scales" in f.files else None
+                    index.sq_norms = f["sq_norms"]
+                    return index
+
+        # Norms (and codes) derived from the mapped file a block at a
+        # time, so the float32 matrix is streamed rather than held
+        norms, codes, scales = [], [], []
+        for s in range(0, len(vectors), _LOAD_BLOCK):
+            block = np.asarray(vectors[s : s + _LOAD_BLOCK], dtype=np.float32)
+            c, sc, sq = index._first_pass(block)
+            norms.append(sq)
+            if c is not None:
+                codes.append(c)
+            if sc is not None:
+                scales.append(sc)
+        index.sq_norms = np.concatenate(norms)
+        if codes:
+            index.codes = np.concatenate(codes)
+            index.scales = np.concatenate(scales) if scales else None
+        return index
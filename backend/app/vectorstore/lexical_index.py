@@ -0,0 +1,173 @@
+import os
+import re
+import threading
+from typing import List
+
+import numpy as np
+from scipy import sparse
+
+
+def simple_tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+class LexicalIndex:
+    """
+    Incrementally maintained BM25 index for one conversation.
+
+    Term frequencies live in CSR arrays (one row per chunk, one column per
+    term), so new chunks are appended without touching existing rows.
+    IDF and length-normalised term weights are derived once per corpus
+    change and cached; a query is then a single sparse mat-vec over the
+    query's columns. Scores match rank_bm25.BM25Okapi over the same corpus.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.ids: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.vocab: dict[str, int] = {}
+
+        # CSR components of the term-frequency matrix
+        self.data = np.zeros(0, dtype=np.float32)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_lens = np.zeros(0, dtype=np.float64)
+
+        # Derived on first query after a change
+        self._weights: sparse.csc_matrix | None = None
+        self._idf: np.ndarray | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --------------------------------------------------
+    # Updates
+    # --------------------------------------------------
+    def add(self, ids: list[str], texts: list[str]):
+        with self._lock:
+            data, indices, lens = [], [], []
+            indptr = [int(self.indptr[-1])]
+
+            for chunk_id, text in zip(ids, texts):
+                # Chroma ignores re-added ids; mirror that here
+                if chunk_id in self.positions:
+                    continue
+
+                tokens = simple_tokenize(text)
+                freqs: dict[int, int] = {}
+                for t in tokens:
+                    col = self.vocab.setdefault(t, len(self.vocab))
+                    freqs[col] = freqs.get(col, 0) + 1
+
+                self.positions[chunk_id] = len(self.ids)
+                self.ids.append(chunk_id)
+
+                indices.extend(freqs.keys())
+                data.extend(freqs.values())
+                lens.append(len(tokens))
+                indptr.append(indptr[-1] + len(freqs))
+
+            if not lens:
+                return
+
+            self.data = np.concatenate([self.data, np.asarray(data, dtype=np.float32)])
+            self.indices = np.concatenate([self.indices, np.asarray(indices, dtype=np.int32)])
+            self.indptr = np.concatenate([self.indptr, np.asarray(indptr[1:], dtype=np.int64)])
+            self.doc_lens = np.concatenate([self.doc_lens, np.asarray(lens, dtype=np.float64)])
+
+            self._weights = None
+            self._idf = None
+
+    # --------------------------------------------------
+    # Scoring
+    # --------------------------------------------------
+    def _prepare(self):
+        n = len(self.ids)
+
+        df = np.bincount(self.indices, minlength=len(self.vocab))
+        idf = np.log(n - df + 0.5) - np.log(df + 0.5)
+        if len(idf):
+            idf[idf < 0] = self.epsilon * idf.mean()
+
+        # BM25 saturation + length normalisation, per non-zero entry
+        avgdl = self.doc_lens.mean()
+        row_norm = self.k1 * (1 - self.b + self.b * self.doc_lens / avgdl)
+        row_of_entry = np.repeat(np.arange(n), np.diff(self.indptr))
+        tf = self.data.astype(np.float64)
+        weights = tf * (self.k1 + 1) / (tf + row_norm[row_of_entry])
+
+        self._weights = sparse.csr_matrix(
+            (weights, self.indices, self.indptr),
+            shape=(n, len(self.vocab)),
+        ).tocsc()
+        self._idf = idf
+
+    def get_scores(self, tokens: list[str]) -> np.ndarray:
+        """
+        BM25 score for every document (higher is better).
+        Only the columns of query terms present in the vocabulary are read.
+        """
+        with self._lock:
+            n = len(self.ids)
+            if not n:
+                return np.zeros(0)
+
+            if self._weights is None:
+                self._prepare()
+
+            cols = [self.vocab[t] for t in tokens if t in self.vocab]
+            if not cols:
+                return np.zeros(n)
+
+            cols, counts = np.unique(cols, return_counts=True)
+            return self._weights[:, cols] @ (self._idf[cols] * counts)
+
+    def top_k(self, tokens: list[str], k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Positions and scores of the k best documents, best first.
+        """
+        scores = self.get_scores(tokens)
+        if k >= len(scores):
+            top = np.argsort(scores)[::-1]
+        else:
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+        return top, scores[top]
+
+    # --------------------------------------------------
+    # Snapshot
+    # --------------------------------------------------
+    def save(self, path: str):
+        with self._lock:
+            terms = sorted(self.vocab, key=self.vocab.get)
+            arrays = {
+                "ids": np.asarray(self.ids, dtype=str),
+                "terms": np.asarray(terms, dtype=str),
+                "data": self.data,
+                "indices": self.indices,
+                "indptr": self.indptr,
+                "doc_lens": self.doc_lens,
+            }
+
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LexicalIndex":
+        index = cls()
+        with np.load(path, allow_pickle=False) as f:
+            index.ids = f["ids"].tolist()
+            index.vocab = {t: i for i, t in enumerate(f["terms"].tolist())}
+            index.data = f["data"]
+            index.indices = f["indices"]
+            index.indptr = f["indptr"]
+            index.doc_lens = f["doc_lens"]
+
+        index.positions = {chunk_id: i for i, chunk_id in enumerate(index.ids)}
+        return index
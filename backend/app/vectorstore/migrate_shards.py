@@ -0,0 +1,119 @@
+"""
+Move chunks from the single "documents" collection into shards.
+
+Reads the unsharded collection a page at a time and upserts each row
+(id, text, embedding, metadata) into the collection shard_name() gives
+for its conversation under the target layout, so the tool is safe to
+re-run after an interruption. Chunk ids are unchanged, so the lexical /
+exact indexes, chunk counts and table store need no migration.
+
+Afterwards every conversation's shard count is checked against the
+source; with --delete-source the old collection is dropped only if all
+counts match. Then set CHROMA_SHARDING to the same layout and restart.
+
+Run from backend/ with the API stopped:
+    python -m app.vectorstore.migrate_shards --layout conversation
+    python -m app.vectorstore.migrate_shards --layout bucket --delete-source
+"""
+
+import argparse
+import time
+from collections import Counter
+
+from app.resources import chroma_client
+from app.vectorstore.store import SHARD_LAYOUTS, _COLLECTION_NAME, shard_name
+
+
+def migrate(layout: str, page_size: int = 1000, dry_run: bool = False) -> Counter:
+    """
+    Copy every row to its shard. Returns rows per conversation.
+    """
+    client = chroma_client()
+    source = client.get_collection(_COLLECTION_NAME)
+    shards = {}
+    copied: Counter = Counter()
+
+    total = source.count()
+    t0 = time.perf_counter()
+    for offset in range(0, total, page_size):
+        page = source.get(
+            limit=page_size,
+            offset=offset,
+            include=["documents", "embeddings", "metadatas"],
+        )
+
+        groups: dict[str, list[int]] = {}
+        for i, meta in enumerate(page["metadatas"]):
+            conversation_id = int(meta["conversation_id"])
+            copied[conversation_id] += 1
+            groups.setdefault(shard_name(conversation_id, layout), []).append(i)
+
+        for name, rows in groups.items():
+            if dry_run:
+                continue
+            if name not in shards:
+                shards[name] = client.get_or_create_collection(name)
+            shards[name].upsert(
+                ids=[page["ids"][i] for i in rows],
+                documents=[page["documents"][i] for i in rows],
+                embeddings=[page["embeddings"][i] for i in rows],
+                metadatas=[page["metadatas"][i] for i in rows],
+            )
+
+        done = min(offset + page_size, total)
+        print(f"  {done}/{total} rows ({done / (time.perf_counter() - t0):.0f} rows/s)", end="\r")
+
+    print()
+    return copied
+
+
+def verify(layout: str, copied: Counter) -> bool:
+    client = chroma_client()
+    ok = True
+    for conversation_id, expected in sorted(copied.items()):
+        shard = client.get_collection(shard_name(conversation_id, layout))
+        if layout == "conversation":
+            found = shard.count()
+        else:
+            found = len(shard.get(where={"conversation_id": conversation_id}, include=[])["ids"])
+        if found != expected:
+            print(f"  ❌ conversation {conversation_id}: {found}/{expected} rows in shard")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--layout", choices=SHARD_LAYOUTS[1:], required=True)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--delete-source", action="store_true")
+    args = parser.parse_args()
+
+    from chromadb.errors import NotFoundError
+
+    try:
+        chroma_client().get_collection(_COLLECTION_NAME)
+    except NotFoundError:
+        print(f"No '{_COLLECTION_NAME}' collection: nothing to migrate.")
+        return
+
+    copied = migrate(args.layout, args.page_size, args.dry_run)
+    shards = {shard_name(c, args.layout) for c in copied}
+    print(f"{sum(copied.values())} rows, {len(copied)} conversations -> {len(shards)} shards")
+    if args.dry_run:
+        return
+
+    if not verify(args.layout, copied):
+        print("Shard counts differ from the source; source collection kept.")
+        return
+
+    print("✅ All shard counts match.")
+    if args.delete_source:
+        chroma_client().delete_collection(_COLLECTION_NAME)
+        print(f"Deleted the '{_COLLECTION_NAME}' collection.")
+    print(f"Set CHROMA_SHARDING={args.layout} and restart the API.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,350 @@
 import json
-import chromadb
-from app.config import settings
+import os
+import threading
+from collections import Counter, OrderedDict
 
-client = chromadb.PersistentClient(
-    path=settings.CHROMA_DB_PATH
-)
+import numpy as np
+
+from app.config import settings, data_path
+from app.resources import chroma_client, table_store
+from app.vectorstore.exact_index import ExactIndex
+from app.vectorstore.lexical_index import LexicalIndex
 
 _COLLECTION_NAME = "documents"
+SHARD_LAYOUTS = ("none", "bucket", "conversation")
+
+# Loaded indexes, least recently used first; evicted ones reload from
+# their snapshot on the next miss
+_lexical_indexes: OrderedDict[int, LexicalIndex] = OrderedDict()
+_lexical_lock = threading.Lock()
+
+_exact_indexes: OrderedDict[int, ExactIndex] = OrderedDict()
+_exact_lock = threading.Lock()
+
+# Conversations being written with add_chunks(persist=False), by number
+# of writers; their snapshots are behind, so their indexes are not evicted
+_held: Counter = Counter()
+_held_lock = threading.Lock()
+
+_chunk_counts: dict[int, int] | None = None
+_counts_lock = threading.Lock()
+
+# Hydrated chunks by id: (text, metadata). Chunks are never updated in
+# place, so entries only go stale when a conversation is deleted.
+_chunk_cache: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+_chunk_cache_lock = threading.Lock()
+
+
+# --------------------------------------------------
+# Collection routing
+# --------------------------------------------------
+_collections: dict[str, object] = {}
+_collections_lock = threading.Lock()
+
+
+def shard_name(conversation_id: int | None, layout: str | None = None) -> str:
+    """
+    Chroma collection holding a conversation's chunks:
+      none          "documents" (everything in one collection)
+      bucket        "documents_b007" (CHROMA_SHARD_BUCKETS shared shards)
+      conversation  "documents_c42" (one collection per conversation)
+    migrate_shards moves an unsharded store into either sharded layout.
+    Moving between sharded layouts or changing CHROMA_SHARD_BUCKETS is
+    not supported by it: re-ingest into a fresh store instead.
+    """
+    layout = layout or settings.CHROMA_SHARDING
+    if conversation_id is None or layout == "none":
+        return _COLLECTION_NAME
+    if layout == "bucket":
+        return f"{_COLLECTION_NAME}_b{conversation_id % settings.CHROMA_SHARD_BUCKETS:03d}"
+    if layout == "conversation":
+        return f"{_COLLECTION_NAME}_c{conversation_id}"
+    raise ValueError(f"Unknown CHROMA_SHARDING: {layout}")
+
+
+def get_collection(conversation_id: int | None = None, create: bool = False):
+    """
+    The collection a conversation's chunks live in (the unsharded
+    "documents" collection when conversation_id is None), or None if it
+    does not exist yet. Only writers pass create=True, so queries about
+    unknown conversations never create empty collections.
+    """
+    name = shard_name(conversation_id)
+    collection = _collections.get(name)
+    if collection is None:
+        from chromadb.errors import NotFoundError
+
+        with _collections_lock:
+            collection = _collections.get(name)
+            if collection is None:
+                client = chroma_client()
+                if create:
+                    collection = client.get_or_create_collection(name)
+                else:
+                    try:
+                        collection = client.get_collection(name)
+                    except NotFoundError:
+                        return None
+                _collections[name] = collection
+    return collection
+
+
+def _get(conversation_id: int, **kwargs) -> dict:
+    """
+    collection.get() on a conversation's collection; a missing
+    collection reads as empty.
+    """
+    collection = get_collection(conversation_id)
+    if collection is None:
+        return {"ids": [], "documents": [], "embeddings": [], "metadatas": []}
+    return collection.get(**kwargs)
+
+
+def _where(conversation_id: int) -> dict | None:
+    # A per-conversation collection holds nothing else, so no filter
+    if settings.CHROMA_SHARDING == "conversation":
+        return None
+    return {"conversation_id": conversation_id}
+
+
+def _conversation_of(chunk_id: str) -> int:
+    return int(chunk_id.split("_", 1)[0])
+
+
+def _by_conversation(ids: list[str]) -> dict[int, list[str]]:
+    groups: dict[int, list[str]] = {}
+    for chunk_id in dict.fromkeys(ids):
+        groups.setdefault(_conversation_of(chunk_id), []).append(chunk_id)
+    return groups
+
+
+def _evict(indexes: OrderedDict, limit: int):
+    """
+    Drop least recently used indexes beyond `limit`, skipping held ones.
+    """
+    with _held_lock:
+        held = set(_held)
+    for conversation_id in list(indexes):
+        if len(indexes) <= limit:
+            break
+        if conversation_id not in held:
+            del indexes[conversation_id]
+
+
+def hold_indexes(conversation_id: int):
+    """
+    Keep a conversation's indexes in memory for a run of
+    add_chunks(persist=False); pair with release_indexes after flush_indexes.
+    """
+    with _held_lock:
+        _held[conversation_id] += 1
+
+
+def release_indexes(conversation_id: int):
+    with _held_lock:
+        _held[conversation_id] -= 1
+        if _held[conversation_id] <= 0:
+            del _held[conversation_id]
+
+
+def _lexical_index_path(conversation_id: int) -> str:
+    return data_path("lexical", f"{conversation_id}.npz")
+
+
+def get_lexical_index(conversation_id: int) -> LexicalIndex:
+    """
+    Per-conversation BM25 index.
+    Loaded from its on-disk snapshot; built from Chroma only once
+    for conversations ingested before the snapshot existed. At most
+    LEXICAL_INDEX_CACHE_SIZE stay in memory.
+    """
+    with _lexical_lock:
+        index = _lexical_indexes.get(conversation_id)
+        if index is not None:
+            _lexical_indexes.move_to_end(conversation_id)
+            return index
+
+        path = _lexical_index_path(conversation_id)
+        if os.path.exists(path):
+            index = LexicalIndex.load(path)
+        else:
+            data = _get(
+                conversation_id,
+                where=_where(conversation_id),
+                include=["documents"],
+            )
+            index = LexicalIndex()
+            index.add(data.get("ids", []), data.get("documents", []))
+            index.save(path)
+
+        _lexical_indexes[conversation_id] = index
+        _evict(_lexical_indexes, settings.LEXICAL_INDEX_CACHE_SIZE)
+        return index
+
+
+# --------------------------------------------------
+# In-process exact vector index (small conversations)
+# --------------------------------------------------
+def _exact_index_path(conversation_id: int) -> str:
+    return data_path("vectors", str(conversation_id))
+
+
+def _uses_exact_index(count: int) -> bool:
+    return 0 < count <= settings.EXACT_SEARCH_MAX_CHUNKS
+
+
+def _exact_index_options() -> tuple[str, int, int]:
+    return (
+        settings.VECTOR_QUANTIZATION,
+        settings.VECTOR_RESCORE_FACTOR,
+        settings.VECTOR_PREFIX_DIMS,
+    )
+
+
+def get_exact_index(conversation_id: int) -> ExactIndex:
+    """
+    Per-conversation vector matrix for exact search.
+    Memory-mapped from its on-disk snapshot; built from Chroma only once
+    for conversations ingested before the snapshot existed. At most
+    EXACT_INDEX_CACHE_SIZE stay loaded.
+    """
+    with _exact_lock:
+        index = _exact_indexes.get(conversation_id)
+        if index is not None:
+            _exact_indexes.move_to_end(conversation_id)
+            return index
+
+        path = _exact_index_path(conversation_id)
+        if ExactIndex.exists(path):
+            index = ExactIndex.load(path, *_exact_index_options())
 
+        if index is None:
+            data = _get(
+                conversation_id,
+                where=_where(conversation_id),
+                include=["embeddings"],
+            )
+            index = ExactIndex(*_exact_index_options())
+            index.add(data.get("ids", []), data.get("embeddings", []))
+            index.save(path)
 
-def get_collection():
-    return client.get_or_create_collection(_COLLECTION_NAME)
+        _exact_indexes[conversation_id] = index
+        _evict(_exact_indexes, settings.EXACT_INDEX_CACHE_SIZE)
+        return index
+
+
+def _drop_exact_index(conversation_id: int):
+    with _exact_lock:
+        _exact_indexes.pop(conversation_id, None)
+        ExactIndex.remove(_exact_index_path(conversation_id))
+
+
+class _ChromaSlice:
+    """
+    One conversation's slice of the shared Chroma collection, with the
+    same search_many() interface as ExactIndex.
+    """
+
+    def __init__(self, conversation_id: int, count: int):
+        self.conversation_id = conversation_id
+        self.count = count
+
+    def search_many(self, query_vecs, k):
+        collection = get_collection(self.conversation_id)
+        if collection is None:
+            return [([], np.zeros(0)) for _ in query_vecs]
+        res = collection.query(
+            query_embeddings=query_vecs,
+            n_results=min(k, self.count),
+            where=_where(self.conversation_id),
+            include=["distances"],
+        )
+        return [
+            (ids, np.asarray(dists, dtype=np.float64))
+            for ids, dists in zip(res["ids"], res["distances"])
+        ]
+
+
+def search_vectors(
+    query_vecs: list[list[float]],
+    conversation_id: int,
+    k: int,
+) -> list[tuple[list[str], np.ndarray]]:
+    """
+    Chunk ids and squared-L2 distances for each query vector, best first.
+    Conversations up to EXACT_SEARCH_MAX_CHUNKS are searched in-process
+    (exact, no HNSW or metadata filter); larger ones go to Chroma.
+    """
+    count = get_chunk_count(conversation_id)
+    if not count or not query_vecs:
+        return [([], np.zeros(0)) for _ in query_vecs]
+
+    if _uses_exact_index(count):
+        backend = get_exact_index(conversation_id)
+    else:
+        backend = _ChromaSlice(conversation_id, count)
+    return backend.search_many(query_vecs, k)
+
+
+# --------------------------------------------------
+# Chunk-count registry
+# --------------------------------------------------
+def _chunk_counts_path() -> str:
+    return data_path("chunk_counts.json")
+
+
+def _load_chunk_counts() -> dict[int, int]:
+    global _chunk_counts
+    if _chunk_counts is None:
+        path = _chunk_counts_path()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                _chunk_counts = {int(k): v for k, v in json.load(f).items()}
+        else:
+            _chunk_counts = {}
+    return _chunk_counts
+
+
+def _save_chunk_counts():
+    with _counts_lock:
+        path = _chunk_counts_path()
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_load_chunk_counts(), f)
+        os.replace(tmp, path)
+
+
+def _set_chunk_count(conversation_id: int, count: int, persist: bool = True):
+    """
+    Update the registry in memory; with persist=False the file is
+    rewritten later by flush_indexes rather than on every batch.
+    """
+    with _counts_lock:
+        _load_chunk_counts()[conversation_id] = count
+    if persist:
+        _save_chunk_counts()
+
+
+def get_chunk_count(conversation_id: int) -> int:
+    """
+    Number of chunks stored for a conversation.
+    Unknown conversations are counted once via an ids-only Chroma get.
+    """
+    with _counts_lock:
+        count = _load_chunk_counts().get(conversation_id)
+    if count is not None:
+        return count
+
+    collection = get_collection(conversation_id)
+    if collection is None:
+        count = 0
+    elif settings.CHROMA_SHARDING == "conversation":
+        count = collection.count()
+    else:
+        data = collection.get(where=_where(conversation_id), include=[])
+        count = len(data.get("ids", []))
+    _set_chunk_count(conversation_id, count)
+    return count
 
 
 def _sanitize_metadata_value(v):
@@ -29,11 +363,19 @@ def add_chunks(
     embeddings: list[list[float]],
     metadatas: list[dict],
     conversation_id: int,
+    start_index: int = 0,
+    persist: bool = True,
 ):
+    """
+    Write chunks and update the conversation's lexical index and count.
+    Streaming callers hold_indexes, add in batches (start_index keeps ids
+    stable) with persist=False, then call flush_indexes once at the end
+    and release_indexes.
+    """
     if not chunks:
         return
 
-    collection = get_collection()
+    collection = get_collection(conversation_id, create=True)
 
     enriched_metadatas = []
     for m in metadatas:
@@ -44,12 +386,146 @@ def add_chunks(
 
     ids = [
         f"{conversation_id}_{doc_id}_{i}"
-        for i in range(len(chunks))
+        for i in range(start_index, start_index + len(chunks))
     ]
 
+    # Load (or bootstrap) the lexical index before writing, so a
+    # bootstrap from Chroma never sees these chunks twice.
+    lexical = get_lexical_index(conversation_id)
+    # Same for the exact index, while the conversation stays small enough
+    exact = None
+    if _uses_exact_index(len(lexical) + len(chunks)):
+        exact = get_exact_index(conversation_id)
+
     collection.add(
         ids=ids,
         documents=chunks,
         embeddings=embeddings,
         metadatas=enriched_metadatas,
     )
+
+    lexical.add(ids, chunks)
+    if persist:
+        lexical.save(_lexical_index_path(conversation_id))
+
+    if exact is not None:
+        exact.add(ids, embeddings)
+        if persist:
+            exact.save(_exact_index_path(conversation_id))
+    else:
+        # Grown past the threshold: Chroma serves it from now on
+        _drop_exact_index(conversation_id)
+
+    # The lexical index skips ids Chroma already had, so its size is exact
+    _set_chunk_count(conversation_id, len(lexical), persist=persist)
+
+
+# --------------------------------------------------
+# Chunk hydration
+# --------------------------------------------------
+def get_chunks(ids: list[str]) -> dict[str, tuple[str, dict]]:
+    """
+    Text and metadata for chunk ids, from a small LRU or one bulk Chroma get.
+    Ids that no longer exist are left out. Each metadata dict is a fresh
+    copy, so callers may annotate it (hydrate_tables attaches full table
+    bodies) without touching the shared cache entry.
+    """
+    found: dict[str, tuple[str, dict]] = {}
+    missing = []
+
+    with _chunk_cache_lock:
+        for chunk_id in ids:
+            hit = _chunk_cache.get(chunk_id)
+            if hit is None:
+                missing.append(chunk_id)
+            else:
+                _chunk_cache.move_to_end(chunk_id)
+                found[chunk_id] = hit
+
+    if missing:
+        fetched = {}
+        for conversation_id, group in _by_conversation(missing).items():
+            data = _get(
+                conversation_id,
+                ids=group,
+                include=["documents", "metadatas"],
+            )
+            fetched.update(
+                (chunk_id, (text, meta or {}))
+                for chunk_id, text, meta in zip(
+                    data["ids"], data["documents"], data["metadatas"]
+                )
+            )
+        found.update(fetched)
+
+        with _chunk_cache_lock:
+            for chunk_id, chunk in fetched.items():
+                _chunk_cache[chunk_id] = chunk
+            while len(_chunk_cache) > settings.HYDRATED_CHUNK_CACHE_SIZE:
+                _chunk_cache.popitem(last=False)
+
+    return {chunk_id: (text, dict(meta)) for chunk_id, (text, meta) in found.items()}
+
+
+def get_chunk_embeddings(ids: list[str]) -> dict[str, list[float]]:
+    """
+    Stored vectors for chunk ids (not cached: only the cascade needs them).
+    """
+    found = {}
+    for conversation_id, group in _by_conversation(ids).items():
+        data = _get(conversation_id, ids=group, include=["embeddings"])
+        found.update(zip(data["ids"], data["embeddings"]))
+    return found
+
+
+def _forget_chunks(conversation_id: int):
+    prefix = f"{conversation_id}_"
+    with _chunk_cache_lock:
+        for chunk_id in [c for c in _chunk_cache if c.startswith(prefix)]:
+            del _chunk_cache[chunk_id]
+
+
+def flush_indexes(conversation_id: int):
+    """
+    Persist the derived indexes and the chunk-count registry after a
+    run of add_chunks(persist=False).
+    """
+    get_lexical_index(conversation_id).save(_lexical_index_path(conversation_id))
+
+    with _exact_lock:
+        exact = _exact_indexes.get(conversation_id)
+    if exact is not None:
+        exact.save(_exact_index_path(conversation_id))
+
+    _save_chunk_counts()
+
+
+def delete_conversation_chunks(conversation_id: int):
+    """
+    Remove a conversation's chunks from Chroma and its derived indexes.
+    """
+    if settings.CHROMA_SHARDING == "conversation":
+        from chromadb.errors import NotFoundError
+
+        name = shard_name(conversation_id)
+        with _collections_lock:
+            _collections.pop(name, None)
+        try:
+            chroma_client().delete_collection(name)
+        except NotFoundError:
+            pass  # never had any chunks
+    else:
+        collection = get_collection(conversation_id)
+        if collection is not None:
+            collection.delete(where=_where(conversation_id))
+    table_store().delete_conversation(conversation_id)
+    _forget_chunks(conversation_id)
+    _drop_exact_index(conversation_id)
+
+    with _lexical_lock:
+        _lexical_indexes.pop(conversation_id, None)
+        path = _lexical_index_path(conversation_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    _set_chunk_count(conversation_id, 0)
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from app.resources import table_store
+
+
+class TableStore:
+    """
+    Full table bodies, keyed by table id, in SQLite next to the Chroma DB.
+
+    Table-row chunks only carry a `table_id` in their metadata; bodies are
+    fetched for the few rows that reach the final results.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tables ("
+            "table_id TEXT PRIMARY KEY, "
+            "conversation_id INTEGER NOT NULL, "
+            "body TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tables_conversation "
+            "ON tables (conversation_id)"
+        )
+        self._conn.commit()
+
+    def put_many(self, conversation_id: int, tables: Iterable[Tuple[str, str]]):
+        """
+        Store (table_id, body JSON) pairs for a conversation.
+        """
+        rows = [(table_id, conversation_id, body) for table_id, body in tables]
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tables (table_id, conversation_id, body) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def get_many(self, table_ids: List[str]) -> Dict[str, Dict]:
+        unique = list(dict.fromkeys(table_ids))
+        found: Dict[str, Dict] = {}
+
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                batch = unique[i : i + 500]
+                rows = self._conn.execute(
+                    "SELECT table_id, body FROM tables "
+                    f"WHERE table_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for table_id, body in rows:
+                    found[table_id] = json.loads(body)
+
+        return found
+
+    def delete_conversation(self, conversation_id: int):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM tables WHERE conversation_id = ?",
+                (conversation_id,),
+            )
+            self._conn.commit()
+
+
+def hydrate_tables(docs: list) -> list:
+    """
+    Attach `meta["table"]` (decoded table JSON) to table-row candidates.
+    Rows ingested before the table store kept the JSON inline.
+    """
+    ids = [d.meta["table_id"] for d in docs if (d.meta or {}).get("table_id")]
+    bodies = table_store().get_many(ids) if ids else {}
+
+    for d in docs:
+        meta = d.meta or {}
+        if meta.get("table_id") in bodies:
+            meta["table"] = bodies[meta["table_id"]]
+        elif isinstance(meta.get("table"), str):
+            try:
+                meta["table"] = json.loads(meta["table"])
+            except Exception:
+                pass
+
+    return docs
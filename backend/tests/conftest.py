@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import; tests never reach OpenAI or a real store
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("CHROMA_DB_PATH", tempfile.mkdtemp(prefix="rag_tests_"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
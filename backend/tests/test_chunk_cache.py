@@ -0,0 +1,19 @@
+from app.vectorstore import store
+
+
+def test_get_chunks_returns_copies_of_cached_meta(monkeypatch):
+    calls = []
+
+    def fake_get(conversation_id, **kwargs):
+        calls.append(kwargs["ids"])
+        return {"ids": ["5_doc_0"], "documents": ["row"], "metadatas": [{"table_id": "t1"}]}
+
+    monkeypatch.setattr(store, "_get", fake_get)
+    monkeypatch.setattr(store, "_chunk_cache", store.OrderedDict())
+
+    _, meta = store.get_chunks(["5_doc_0"])["5_doc_0"]
+    meta["table"] = {"rows": [[1, 2]]}
+
+    _, cached = store.get_chunks(["5_doc_0"])["5_doc_0"]
+    assert len(calls) == 1
+    assert "table" not in cached
@@ -0,0 +1,24 @@
+import asyncio
+
+from app.retrieval import hybrid
+from app.retrieval.candidate import EMPTY_HITS
+
+
+def test_empty_conversation_cancels_a_started_embedding_task(monkeypatch):
+    monkeypatch.setattr(hybrid, "get_chunk_count", lambda cid: 0)
+    monkeypatch.setattr(hybrid, "bm25_search", lambda *a, **kw: EMPTY_HITS)
+    monkeypatch.setattr(hybrid, "hydrate", lambda candidates: candidates)
+
+    async def slow_embedding():
+        await asyncio.sleep(10)
+        return [0.0]
+
+    async def main():
+        task = asyncio.create_task(slow_embedding())
+        docs = await hybrid.hybrid_retrieve_async("q", 1, query_vec=task)
+        await asyncio.sleep(0)
+        return docs, task
+
+    docs, task = asyncio.run(main())
+    assert docs == []
+    assert task.cancelled()
@@ -0,0 +1,80 @@
+import pytest
+
+from app.config import settings
+from app.vectorstore import store
+
+
+@pytest.fixture
+def small_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "LEXICAL_INDEX_CACHE_SIZE", 2)
+    monkeypatch.setattr(store, "_lexical_indexes", store.OrderedDict())
+    monkeypatch.setattr(store, "_get", lambda cid, **kw: {"ids": [f"{cid}_d_0"], "documents": ["alpha beta"]})
+
+
+def test_lexical_indexes_are_bounded_and_reload_from_snapshot(small_cache):
+    for conversation_id in (1, 2, 3):
+        store.get_lexical_index(conversation_id)
+    assert list(store._lexical_indexes) == [2, 3]
+
+    reloaded = store.get_lexical_index(1)
+    assert reloaded.ids == ["1_d_0"]
+    assert list(store._lexical_indexes) == [3, 1]
+
+
+def test_held_indexes_are_not_evicted(small_cache):
+    store.hold_indexes(1)
+    try:
+        for conversation_id in (1, 2, 3, 4):
+            store.get_lexical_index(conversation_id)
+        assert 1 in store._lexical_indexes
+        assert len(store._lexical_indexes) == 2
+    finally:
+        store.release_indexes(1)
+    assert not store._held
+
+
+def test_exact_indexes_are_bounded_and_reload_from_snapshot(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "EXACT_INDEX_CACHE_SIZE", 1)
+    monkeypatch.setattr(store, "_exact_indexes", store.OrderedDict())
+    monkeypatch.setattr(store, "_get", lambda cid, **kw: {"ids": [f"{cid}_d_0"], "embeddings": [[1.0, 0.0]]})
+
+    store.get_exact_index(1)
+    store.get_exact_index(2)
+    assert list(store._exact_indexes) == [2]
+
+    ids, _ = store.get_exact_index(1).search_many([[1.0, 0.0]], 1)[0]
+    assert ids == ["1_d_0"]
+    assert list(store._exact_indexes) == [1]
+
+
+def test_chunk_counts_are_written_once_per_flush(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "CHROMA_DB_PATH", str(tmp_path))
+    monkeypatch.setattr(store, "_chunk_counts", {})
+    monkeypatch.setattr(store, "_lexical_indexes", store.OrderedDict())
+    monkeypatch.setattr(store, "_exact_indexes", store.OrderedDict())
+    monkeypatch.setattr(store, "_collections", {})
+    monkeypatch.setattr(store, "get_collection", lambda cid, create=False: _NullCollection())
+    monkeypatch.setattr(store, "_get", lambda cid, **kw: {"ids": [], "documents": [], "embeddings": []})
+
+    writes = []
+    real_save = store._save_chunk_counts
+    monkeypatch.setattr(store, "_save_chunk_counts", lambda: (writes.append(1), real_save()))
+
+    for batch in range(3):
+        store.add_chunks(
+            "doc", [f"text {batch}"], [[float(batch), 1.0]], [{}],
+            conversation_id=9, start_index=batch, persist=False,
+        )
+    assert store.get_chunk_count(9) == 3
+    assert writes == []
+
+    store.flush_indexes(9)
+    assert len(writes) == 1
+    assert (tmp_path / "chunk_counts.json").read_text() == '{"9": 3}'
+
+
+class _NullCollection:
+    def add(self, **kwargs):
+        pass
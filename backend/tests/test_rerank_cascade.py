@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.retrieval import rerank as rr
+from app.retrieval.candidate import Candidate
+
+
+def _candidates(sources: str):
+    return [
+        Candidate(f"1_doc_{i}", 0.0, f"text {i}", {"source": src})
+        for i, src in enumerate(sources)
+    ]
+
+
+@pytest.fixture
+def stub_scores(monkeypatch):
+    def install(cheap):
+        monkeypatch.setattr(rr, "cheap_scores", lambda query, cands: np.asarray(cheap))
+        monkeypatch.setattr(
+            rr, "score_pairs",
+            lambda query, texts, use_cache=True: np.arange(len(texts), 0, -1, dtype=np.float32),
+        )
+    return install
+
+
+def test_infinite_margin_always_cross_encodes_single_source(stub_scores):
+    # One source: the cap admits only max_per_source candidates
+    stub_scores([1.0, 0.9, 0.8, 0.7, 0.6, 0.5, 0.4])
+    trace = {}
+    out = rr.rerank_cascade(
+        "q", _candidates("AAAAAAA"), top_k=5, max_per_source=2,
+        head=4, margin=float("inf"), trace=trace,
+    )
+    assert trace["pairs_scored"] > 0
+    assert trace["early_exit"] is False
+    assert trace["score_kind"] == "cross_encoder"
+    assert len(out) == 2
+
+
+def test_infinite_margin_never_exits_early(stub_scores):
+    stub_scores([1.0, 0.9, 0.1, 0.05, 0.0, -0.1])
+    trace = {}
+    rr.rerank_cascade(
+        "q", _candidates("ABCDEF"), top_k=2, max_per_source=2,
+        margin=float("inf"), trace=trace,
+    )
+    assert trace["pairs_scored"] > 0
+
+
+def test_margin_measured_against_next_admissible_candidate(stub_scores):
+    # A's third chunk (0.8) is capped out; the next admissible is B at 0.3
+    stub_scores([1.0, 0.95, 0.8, 0.3, 0.29])
+    trace = {}
+    out = rr.rerank_cascade(
+        "q", _candidates("AAABC"), top_k=2, max_per_source=2,
+        margin=0.5, trace=trace,
+    )
+    assert trace == {"pairs_scored": 0, "early_exit": True, "score_kind": "cheap"}
+    assert [c.id for c in out] == ["1_doc_0", "1_doc_1"]
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from app.resources import once
+
+
+def test_once_builds_a_single_instance_under_concurrent_first_use():
+    builds = []
+
+    @once
+    def resource():
+        time.sleep(0.05)
+        builds.append(object())
+        return builds[-1]
+
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(resource())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(builds) == 1
+    assert all(g is builds[0] for g in got)
+
+
+def test_once_retries_after_a_failed_build():
+    attempts = []
+
+    @once
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("not yet")
+        return "ok"
+
+    try:
+        flaky()
+    except RuntimeError:
+        pass
+    assert flaky() == "ok"
+    assert flaky() == "ok"
+    assert len(attempts) == 2
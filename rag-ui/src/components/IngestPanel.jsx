@@ -1,7 +1,7 @@
 import { useState } from "react";
 import { api } from "../api";
 
-export default function IngestPanel({ conversationId, onConversationCreated }) {
+export default function IngestPanel({ conversationId, onConversationCreated, onIngested }) {
   const [file, setFile] = useState(null);
   const [url, setUrl] = useState("");
   const [status, setStatus] = useState("");
@@ -20,6 +20,34 @@ export default function IngestPanel({ conversationId, onConversationCreated }) {
     return newId;
   }
 
+  // -----------------------------
+  // JOB POLLING
+  // -----------------------------
+  async function waitForJob(jobId, label) {
+    for (;;) {
+      const res = await api.get(`/ingest/jobs/${jobId}`);
+      const job = res.data;
+
+      // "partial": some chunks were stored before the error and stay searchable
+      if (job.status === "done" || job.status === "partial") return job;
+      if (job.status === "failed") throw new Error(job.error || "Ingestion failed");
+
+      const progress = job.chunks ? ` (${job.chunks} chunks)` : "";
+      setStatus(`⏱️ ${label}: ${job.stage}${progress}...`);
+      await new Promise((r) => setTimeout(r, 1000));
+    }
+  }
+
+  function reportJob(job, label) {
+    onIngested?.();
+    if (job.status === "partial") {
+      setStatus(`⚠️ ${label} partially ingested (${job.chunks} chunks): ${job.error}`);
+      return false;
+    }
+    setStatus(`✅ ${label} ingested successfully`);
+    return true;
+  }
+
   // -----------------------------
   // FILE INGESTION
   // -----------------------------
@@ -35,15 +63,15 @@ export default function IngestPanel({ conversationId, onConversationCreated }) {
       const form = new FormData();
       form.append("file", file);
 
-      await api.post("/ingest", form, {
+      const res = await api.post("/ingest", form, {
         params: { conversation_id: realConversationId },
       });
+      const job = await waitForJob(res.data.job_id, "Ingesting file");
 
-      setStatus("✅ File ingested successfully");
-      setFile(null); // reset file
+      if (reportJob(job, "File")) setFile(null); // reset file
     } catch (e) {
       console.error(e);
-      setStatus("❌ Failed to ingest file");
+      setStatus(`❌ Failed to ingest file: ${e.message}`);
     } finally {
       setIsUploadingFile(false);
     }
@@ -61,18 +89,18 @@ export default function IngestPanel({ conversationId, onConversationCreated }) {
 
       const realConversationId = await ensureConversationExists();
 
-      await api.post("/ingest/url", null, {
+      const res = await api.post("/ingest/url", null, {
         params: {
           url,
           conversation_id: realConversationId,
         },
       });
+      const job = await waitForJob(res.data.job_id, "Ingesting URL");
 
-      setStatus("✅ URL ingested successfully");
-      setUrl("");
+      if (reportJob(job, "URL")) setUrl("");
     } catch (e) {
       console.error(e);
-      setStatus("❌ Failed to ingest URL");
+      setStatus(`❌ Failed to ingest URL: ${e.message}`);
     } finally {
       setIsUploadingUrl(false);
     }
@@ -47,6 +47,7 @@ const Sidebar = forwardRef(function Sidebar({ onSelect, activeId }, ref) {
           await loadConversations();
           onSelect(newId);
         }}
+        onIngested={loadConversations}
       />
 
       <button className="sidebarPrimaryBtn" onClick={createDraftConversation}>